@@ -0,0 +1,257 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+
+# benchmark suite for the prediction pipeline and the page reruns
+#
+#   python benchmark.py --save-baseline        # measure and store data/benchmark_baseline.json
+#   python benchmark.py                        # measure and compare, exit code 1 on a regression
+#   python benchmark.py --no-pages --threshold 0.5
+#
+# every function runs over the same seeded corpus of profiles with a cold prediction cache,
+# so the numbers measure the real model path (except the "[cached]" entry)
+
+# page scenarios log in as the seed user - use a throwaway copy of the profiles, never data/profiles.db
+os.environ.setdefault("PROFILES_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="benchmark_"), "profiles.db"))
+
+import streamlit as st
+import computations
+from computations import prediction_cache
+
+BASELINE_PATH = "data/benchmark_baseline.json"
+
+# fail if p50 or p95 got slower than baseline * (1 + threshold)
+REGRESSION_THRESHOLD = float(os.environ.get("BENCHMARK_THRESHOLD", 0.25))
+
+ROOM_TYPES = ["Entire home/apt", "Private room", "Shared room", "Hotel room"]
+
+
+# ------------------------------------------------------------
+# Corpus
+# ------------------------------------------------------------
+def make_airbnb_profiles(n: int, seed: int = 42) -> list:
+    """Realistic, reproducible listing inputs (same seed → same corpus)."""
+    rng = random.Random(seed)
+    amenity_labels = sorted(computations.get_label_to_amenity_col())
+    return [
+        {
+            "host_is_superhost": rng.random() < 0.3,
+            "host_listings_count": min(int(rng.expovariate(0.4)), 50),
+            "host_identity_verified": rng.random() < 0.7,
+            "bathrooms": rng.choice([1, 1, 1, 2, 2, 3]),
+            "bedrooms": rng.choice([1, 1, 2, 2, 3, 4, 5]),
+            "arrondissement": rng.randint(1, 20),
+            "room_type": rng.choices(ROOM_TYPES, weights=[80, 15, 2, 3])[0],
+            "amenities": rng.sample(amenity_labels, rng.randint(0, min(15, len(amenity_labels)))),
+        }
+        for _ in range(n)
+    ]
+
+
+def make_renting_profiles(n: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "Number of rooms renting": rng.randint(1, 10),
+            "arrondissement": rng.randint(1, 20),
+            "furnished": rng.random() < 0.4,
+        }
+        for _ in range(n)
+    ]
+
+
+# ------------------------------------------------------------
+# Measurement
+# ------------------------------------------------------------
+def summarize(latencies_ns: list, peak_bytes: int) -> dict:
+    ms = np.asarray(latencies_ns, dtype=float) / 1e6
+    return {
+        "calls": len(ms),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "throughput_per_s": round(len(ms) / (ms.sum() / 1e3), 2) if ms.sum() > 0 else None,
+        "peak_mem_kb": round(peak_bytes / 1024, 1),
+    }
+
+
+def measure(fn, inputs: list, repeat: int = 1, cold: bool = True, warmup: int = 3) -> dict:
+    """
+    Times fn(x) for every x in inputs (repeat times). cold=True clears the prediction cache
+    before each call. Peak memory is taken in a separate tracemalloc pass so it does not
+    distort the timings (Python allocations only, not XGBoost's native buffers).
+    """
+    for x in inputs[:warmup]:  # model loading, booster parity check, ...
+        fn(x)
+
+    latencies = []
+    for _ in range(repeat):
+        for x in inputs:
+            if cold:
+                prediction_cache.clear()
+            start = time.perf_counter_ns()
+            fn(x)
+            latencies.append(time.perf_counter_ns() - start)
+
+    tracemalloc.start()
+    for x in inputs[:max(1, len(inputs) // 10)]:
+        if cold:
+            prediction_cache.clear()
+        fn(x)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return summarize(latencies, peak)
+
+
+def function_benchmarks(n_profiles: int, repeat: int, seed: int) -> dict:
+    airbnb_profiles = make_airbnb_profiles(n_profiles, seed)
+    renting_profiles = make_renting_profiles(n_profiles, seed)
+
+    def price_impact(profile):
+        computations.run_computations_airbnb(profile)
+        computations.calculate_price_impact_kpis(profile, st.session_state["user_price_prediction"])
+
+    return {
+        "build_airbnb_feature_df": measure(computations.build_airbnb_feature_df, airbnb_profiles, repeat),
+        "run_computations_airbnb": measure(computations.run_computations_airbnb, airbnb_profiles, repeat),
+        "run_computations_airbnb[cached]": measure(computations.run_computations_airbnb, airbnb_profiles, repeat, cold=False),
+        "run_computations_renting": measure(computations.run_computations_renting, renting_profiles, repeat),
+        "predict_all_arrondissement_prices": measure(computations.predict_all_arrondissement_prices, airbnb_profiles, repeat),
+        "calculate_price_impact_kpis": measure(price_impact, airbnb_profiles, repeat),
+    }
+
+
+# ------------------------------------------------------------
+# Page scenarios (headless reruns through Streamlit's AppTest)
+# ------------------------------------------------------------
+# page → action applied before each timed rerun (i = iteration)
+PAGE_SCENARIOS = {
+    "page_airbnb_input_change": ("Airbnb", lambda at, i: at.sidebar.number_input(key="sb_bedrooms").set_value(1 + i % 5)),
+    "page_renting_input_change": ("Renting", lambda at, i: at.sidebar.number_input[1].set_value(1 + i % 10)),
+    "page_comparison_slider": ("Comparison", lambda at, i: at.sidebar.slider[0].set_value(20.0 + i % 60)),
+}
+
+
+def page_benchmarks(iterations: int, username: str = "test") -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    for name, (page, action) in PAGE_SCENARIOS.items():
+        at = AppTest.from_file(os.path.abspath("main.py"), default_timeout=120)
+        at.run()
+        at.session_state["logged_in"] = True
+        at.session_state["username"] = username
+        at.run()
+        at.sidebar.radio[0].set_value(page).run()
+
+        def rerun(i):
+            action(at, i)
+            at.run()
+            if at.exception:
+                raise RuntimeError(f"{name}: {at.exception[0].message}")
+
+        results[name] = measure(rerun, list(range(iterations)))
+    return results
+
+
+# ------------------------------------------------------------
+# Baseline / regressions
+# ------------------------------------------------------------
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Returns a list of regression messages (empty = ok)."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(
+                    f"{name}: {metric} {current[metric]:.3f} ms vs baseline {previous[metric]:.3f} ms "
+                    f"(+{(current[metric] / previous[metric] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def print_table(results: dict):
+    print(f"{'benchmark':<36}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'calls/s':>10}{'peak KB':>10}")
+    for name, r in results.items():
+        print(f"{name:<36}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['throughput_per_s'] or 0:>10.1f}{r['peak_mem_kb']:>10.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the prediction pipeline and page reruns.")
+    parser.add_argument("--profiles", type=int, default=200, help="corpus size per function benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--page-iterations", type=int, default=20, help="timed reruns per page scenario")
+    parser.add_argument("--no-pages", action="store_true", help="skip the AppTest page scenarios")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="allowed slowdown, 0.25 = +25%%")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # bare-mode session_state warnings would flood the output (and the timings)
+    for name in [n for n in logging.root.manager.loggerDict if n.startswith("streamlit")] + ["streamlit"]:
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    results = function_benchmarks(args.profiles, args.repeat, args.seed)
+    if not args.no_pages:
+        results.update(page_benchmarks(args.page_iterations))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "profiles": args.profiles,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline} - run with --save-baseline first.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        for message in regressions:
+            print("  " + message)
+        return 1
+
+    print(f"\nNo regressions above {args.threshold:.0%} against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,149 +1,180 @@
 import pandas as pd
 import streamlit as st
-import pickle
 import numpy as np
+import os
+import hashlib
+import threading
+from functools import lru_cache
+from itertools import islice
+from collections import OrderedDict
+from feature_capture import capture_features
+from model_registry import model_registry
+from feature_schema import load_manifest, model_features
+from renting_table import lookup_renting_price
+from timing import timed
+from metrics import metrics_registry, inc
 
 # script to run all the computations - needed to then display price, profit, etc
 
-model_airbnb_price = pickle.load(open("ml_models/predict_airbnb_price.sav", "rb"))
-model_cleaning_costs = pickle.load(open("ml_models/predict_cost_of_cleaning.sav", "rb"))
-model_renting_price = pickle.load(open("ml_models/predict_renting_price.sav", "rb"))
+# models are loaded lazily by the registry (on first use or by the warm-up thread started in main.py)
+def model_airbnb_price():
+    return model_registry.get("airbnb")
 
+def model_cleaning_costs():
+    return model_registry.get("cleaning")
 
+def model_renting_price():
+    return model_registry.get("renting")
 
-# (NEW) Load model feature columns dynamically
-airbnb_features = list(model_airbnb_price.feature_names_in_)
 
+# feature order of the renting model, from the schema manifest (ml_models/feature_schema.json)
+rent_features = model_features("renting")
 
-rent_features = [
-    "Nombre de pièces principales",
-    "Arrondissement_10e",
-    "Arrondissement_11e",
-    "Arrondissement_12e",
-    "Arrondissement_13e",
-    "Arrondissement_14e",
-    "Arrondissement_15e",
-    "Arrondissement_16e",
-    "Arrondissement_17e",
-    "Arrondissement_18e",
-    "Arrondissement_19e",
-    "Arrondissement_1er",
-    "Arrondissement_20e",
-    "Arrondissement_2e",
-    "Arrondissement_3e",
-    "Arrondissement_4e",
-    "Arrondissement_5e",
-    "Arrondissement_6e",
-    "Arrondissement_7e",
-    "Arrondissement_8e",
-    "Arrondissement_9e",
-    "Type de locationom_meublé",
-    "Type de locationom_non meublé"
-]
 
+###########################
+# FEATURE ENCODER
+###########################
 
-#Cleaning the columns names for better UX
-def clean_amenity_name(col):
-    # Convert model column name to a clean user-friendly label
-    x = col.replace("amenity__", "").rstrip("_")
-    x = x.replace("_", " ")
-    x = x.replace("u2013", "–")
-    return x.strip().title()
-
-def build_amenity_maps():
-    amenity_cols = [c for c in airbnb_features if c.startswith("amenity__")]
-    label_to_col = {clean_amenity_name(c): c for c in amenity_cols}
-    col_to_label = {c: clean_amenity_name(c) for c in amenity_cols}
-    return label_to_col, col_to_label
+# Map for the One-Hot Arrondissement column names (as used by both ML models)
+arr_map = {
+    1: "Arrondissement_1er", 2: "Arrondissement_2e", 3: "Arrondissement_3e", 4: "Arrondissement_4e", 5: "Arrondissement_5e",
+    6: "Arrondissement_6e", 7: "Arrondissement_7e", 8: "Arrondissement_8e", 9: "Arrondissement_9e", 10: "Arrondissement_10e",
+    11: "Arrondissement_11e", 12: "Arrondissement_12e", 13: "Arrondissement_13e", 14: "Arrondissement_14e", 15: "Arrondissement_15e",
+    16: "Arrondissement_16e", 17: "Arrondissement_17e", 18: "Arrondissement_18e", 19: "Arrondissement_19e", 20: "Arrondissement_20e",
+}
 
-label_to_amenity_col, amenity_col_to_label = build_amenity_maps()
+room_categories = ["Entire home/apt", "Hotel room", "Private room", "Shared room"]
 
+# column positions are resolved once, so encoding a profile is only array writes
+rent_col_idx = {col: i for i, col in enumerate(rent_features)}
+rent_arr_idx = {num: rent_col_idx[col] for num, col in arr_map.items() if col in rent_col_idx}
 
 
+@lru_cache(maxsize=None)
+def get_airbnb_schema() -> dict:
+    """
+    Feature order and column positions of the Airbnb price model.
+    Built once, on first use, from the schema manifest (no model unpickling needed).
+    """
+    airbnb_features = list(model_features("airbnb"))
+    amenity_col_to_label = load_manifest()["amenity_col_to_label"]
+    label_to_amenity_col = {label: col for col, label in amenity_col_to_label.items()}
 
-def build_airbnb_feature_df(user_profile: dict) -> pd.DataFrame:
-    
-    # base fields
-    host_is_superhost = int(bool(user_profile.get("host_is_superhost", False)))
-    host_listings_count = int(user_profile.get("host_listings_count", 0))
-    host_identity_verified = int(bool(user_profile.get("host_identity_verified", False)))
-    bathrooms_text = int(user_profile.get("bathrooms", 1))
-    bedrooms = int(user_profile.get("bedrooms", 1))
-
-    # arrondissement one-hot
-    arr_num = int(user_profile.get("arrondissement", 1))
-    arr_map = {
-        1: "Arrondissement_1er",
-        2: "Arrondissement_2e",
-        3: "Arrondissement_3e",
-        4: "Arrondissement_4e",
-        5: "Arrondissement_5e",
-        6: "Arrondissement_6e",
-        7: "Arrondissement_7e",
-        8: "Arrondissement_8e",
-        9: "Arrondissement_9e",
-        10: "Arrondissement_10e",
-        11: "Arrondissement_11e",
-        12: "Arrondissement_12e",
-        13: "Arrondissement_13e",
-        14: "Arrondissement_14e",
-        15: "Arrondissement_15e",
-        16: "Arrondissement_16e",
-        17: "Arrondissement_17e",
-        18: "Arrondissement_18e",
-        19: "Arrondissement_19e",
-        20: "Arrondissement_20e",
+    col_idx = {col: i for i, col in enumerate(airbnb_features)}
+    return {
+        "features": airbnb_features,
+        "label_to_amenity_col": label_to_amenity_col,
+        "amenity_col_to_label": amenity_col_to_label,
+        "col_idx": col_idx,
+        "arr_idx": {num: col_idx[col] for num, col in arr_map.items() if col in col_idx},
+        "room_idx": {r: col_idx[f"room_{r}"] for r in room_categories if f"room_{r}" in col_idx},
+        "amenity_idx": {label: col_idx[col] for label, col in label_to_amenity_col.items()},
     }
 
-    # room type one-hot
-    room_type = user_profile.get("room_type", "Entire home/apt")
-    room_categories = ["Entire home/apt", "Hotel room", "Private room", "Shared room"]
 
-    # amenities (still needed?)
-    amenities = user_profile.get("amenities", []) or []
+def get_airbnb_features() -> list:
+    return get_airbnb_schema()["features"]
+
+
+def get_label_to_amenity_col() -> dict:
+    """Amenity label shown in the UI -> model column."""
+    return get_airbnb_schema()["label_to_amenity_col"]
+
 
-    # start with all zeros
-    feat = {name: 0 for name in airbnb_features}
+@timed("encode.airbnb")
+def encode_airbnb_features(user_profiles: list, out: np.ndarray = None) -> np.ndarray:
+    """
+    Encodes N user profiles into an (N, F) float32 matrix in airbnb_features column order.
+    Pass a preallocated (N, F) float32 array as out to reuse it between calls.
+    """
+    schema = get_airbnb_schema()
+    airbnb_arr_idx = schema["arr_idx"]
+    airbnb_room_idx = schema["room_idx"]
+    airbnb_amenity_idx = schema["amenity_idx"]
+
+    if out is None:
+        out = np.zeros((len(user_profiles), len(schema["features"])), dtype=np.float32)
+    else:
+        out[:] = 0
+
+    i_superhost = schema["col_idx"]["host_is_superhost"]
+    i_listings = schema["col_idx"]["host_listings_count"]
+    i_verified = schema["col_idx"]["host_identity_verified"]
+    i_bathrooms = schema["col_idx"]["bathrooms_text"]
+    i_bedrooms = schema["col_idx"]["bedrooms"]
 
-    # amenities dynamic one-hot
-    for label in amenities:
-        model_col = label_to_amenity_col.get(label)
-        if model_col in feat:
-            feat[model_col] = 1
+    for row, user_profile in zip(out, user_profiles):
 
+        # simple numeric fields
+        row[i_superhost] = int(bool(user_profile.get("host_is_superhost", False)))
+        row[i_listings] = int(user_profile.get("host_listings_count", 0))
+        row[i_verified] = int(bool(user_profile.get("host_identity_verified", False)))
+        row[i_bathrooms] = int(user_profile.get("bathrooms", 1))
+        row[i_bedrooms] = int(user_profile.get("bedrooms", 1))
 
+        # arrondissement one-hot
+        arr_i = airbnb_arr_idx.get(int(user_profile.get("arrondissement", 1)))
+        if arr_i is not None:
+            row[arr_i] = 1
 
-    # simple numeric fields
-    feat["host_is_superhost"] = host_is_superhost
-    feat["host_listings_count"] = host_listings_count
-    feat["host_identity_verified"] = host_identity_verified
-    feat["bathrooms_text"] = bathrooms_text
-    feat["bedrooms"] = bedrooms
+        # room type one-hot
+        room_i = airbnb_room_idx.get(user_profile.get("room_type", "Entire home/apt"))
+        if room_i is not None:
+            row[room_i] = 1
 
-    # arrondissement one-hot
-    arr_col = arr_map.get(arr_num)
-    if arr_col in feat:
-        feat[arr_col] = 1
+        # amenities dynamic one-hot
+        for label in user_profile.get("amenities", []) or []:
+            amenity_i = airbnb_amenity_idx.get(label)
+            if amenity_i is not None:
+                row[amenity_i] = 1
 
-    # room type one-hot
-    for r in room_categories:
-        col = f"room_{r}"
-        if col in feat:
-            feat[col] = int(room_type == r)
+    return out
+
+
+@timed("encode.renting")
+def encode_renting_features(user_profiles: list, out: np.ndarray = None) -> np.ndarray:
+    """
+    Encodes N user profiles into an (N, F) float32 matrix in rent_features column order.
+    Pass a preallocated (N, F) float32 array as out to reuse it between calls.
+    """
+    if out is None:
+        out = np.zeros((len(user_profiles), len(rent_features)), dtype=np.float32)
+    else:
+        out[:] = 0
 
-    # amenities dynamic one-hot
-    for label in amenities:
-        model_col = label_to_amenity_col.get(label)
-        if model_col in feat:
-            feat[model_col] = 1
+    i_rooms = rent_col_idx["Nombre de pièces principales"]
+    i_furnished = rent_col_idx["Type de locationom_meublé"]
+    i_unfurnished = rent_col_idx["Type de locationom_non meublé"]
 
+    for row, user_profile in zip(out, user_profiles):
+
+        # One-hot arrondissement
+        arr_i = rent_arr_idx.get(int(user_profile.get("arrondissement", 1)))
+        if arr_i is not None:
+            row[arr_i] = 1
+
+        # Number of rooms (missing → NaN)
+        rooms = user_profile.get("Number of rooms renting")
+        row[i_rooms] = np.nan if rooms is None else rooms
+
+        # Renting type one-hot: furnished or unfurnished
+        if bool(user_profile.get("furnished", False)):
+            row[i_furnished] = 1
+        else:
+            row[i_unfurnished] = 1
+
+    return out
+
+
+def build_airbnb_feature_df(user_profile: dict) -> pd.DataFrame:
 
     # build DataFrame in the exact column order to make sure it works for the model
-    row = [[feat[col] for col in airbnb_features]]
-    df_features_airbnb = pd.DataFrame(row, columns=airbnb_features)
+    airbnb_features = get_airbnb_features()
+    X_airbnb = encode_airbnb_features([user_profile])
+    df_features_airbnb = pd.DataFrame(X_airbnb, columns=airbnb_features)
     
-    # debug: everytime i change something a dataset gets created and overwritten
-    df_features_airbnb.to_csv("data/user_dataset_airbnb.csv", index=False)
+    # debug: optional feature capture (FEATURE_CAPTURE=1), written in the background - no disk I/O here
+    capture_features("airbnb", airbnb_features, X_airbnb, session=st.session_state.get("username"))
     
     return df_features_airbnb
 
@@ -152,127 +183,380 @@ def build_airbnb_feature_df(user_profile: dict) -> pd.DataFrame:
 
 def build_renting_feature_df(user_profile: dict) -> pd.DataFrame:
 
-    feat = {name: 0 for name in rent_features}
-
-    # One-hot arrondissement
-    arr_num = int(user_profile.get("arrondissement", 1))
-
-    arr_map = {
-        1:  "Arrondissement_1er",
-        2:  "Arrondissement_2e",
-        3:  "Arrondissement_3e",
-        4:  "Arrondissement_4e",
-        5:  "Arrondissement_5e",
-        6:  "Arrondissement_6e",
-        7:  "Arrondissement_7e",
-        8:  "Arrondissement_8e",
-        9:  "Arrondissement_9e",
-        10: "Arrondissement_10e",
-        11: "Arrondissement_11e",
-        12: "Arrondissement_12e",
-        13: "Arrondissement_13e",
-        14: "Arrondissement_14e",
-        15: "Arrondissement_15e",
-        16: "Arrondissement_16e",
-        17: "Arrondissement_17e",
-        18: "Arrondissement_18e",
-        19: "Arrondissement_19e",
-        20: "Arrondissement_20e",
-    }
+    X_renting = encode_renting_features([user_profile])
+    df_features_renting = pd.DataFrame(X_renting, columns=rent_features)
+    
+    # debug: optional feature capture (FEATURE_CAPTURE=1), written in the background - no disk I/O here
+    capture_features("renting", rent_features, X_renting, session=st.session_state.get("username"))
 
-    arr_col = arr_map.get(arr_num)
-    if arr_col in feat:
-        feat[arr_col] = 1
+    return df_features_renting
 
-    # Number of rooms
-    feat["Nombre de pièces principales"] = user_profile.get("Number of rooms renting")
 
-    # Renting type one-hot
-    user_will_rent = user_profile.get("rent", False)
-    user_furnished = bool(user_profile.get("furnished", False))
+###########################
+# PREDICTION CACHE
+###########################
 
-    #if user_will_rent: 
-    if user_furnished:
-        feat["Type de locationom_meublé"] = 1
-        feat["Type de locationom_non meublé"] = 0  
-        # Unfurnished
-    else:
-        feat["Type de locationom_meublé"] = 0
-        feat["Type de locationom_non meublé"] = 1
-    
-    # if he doesn't rent set everything to 0
-    #else:
-        #feat["Type de locationom_meublé"] = 0
-        #feat["Type de locationom_non meublé"] = 0
-           
-            
-    row = [[feat[col] for col in rent_features]]
-    df_features_renting = pd.DataFrame(row, columns=rent_features)
-    
-    # debug: everytime i change something a dataset gets created and overwritten
-    df_features_renting.to_csv("data/user_dataset_renting.csv",  encoding="utf-8-sig", index=False)
+class PredictionCache:
+    """
+    Process-wide LRU cache for model predictions, shared by all sessions.
 
-    return df_features_renting
+    Keys are built from the encoded feature row (so they do not depend on amenity order
+    or on profile fields the models ignore) plus the hash of the model files used.
+    """
 
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(namespace: str, model_hash: str, features: np.ndarray) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(namespace.encode())
+        h.update(model_hash.encode())
+        h.update(np.ascontiguousarray(features, dtype=np.float32).tobytes())
+        return h.hexdigest()
+
+    def get_or_compute(self, key: str, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # compute outside the lock so other sessions are not blocked by the model call
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+prediction_cache = PredictionCache(max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", 4096)))
+
+# hit / miss counters are read at scrape time, nothing extra on the hot path
+if metrics_registry is not None:
+    metrics_registry.register_callback(
+        "app_cache_hits_total", "counter", "Cache hits per cache.",
+        lambda: [({"cache": "predictions"}, prediction_cache.hits)],
+    )
+    metrics_registry.register_callback(
+        "app_cache_misses_total", "counter", "Cache misses per cache.",
+        lambda: [({"cache": "predictions"}, prediction_cache.misses)],
+    )
+
+
+###########################
+# NATIVE XGBOOST PREDICT
+###########################
+
+# boosters per thread count (None = the model's own setting), shared by all sessions
+airbnb_boosters = {}
+airbnb_boosters_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_airbnb_iteration_range() -> tuple:
+    """Trees used by the sklearn wrapper's predict (stops at best_iteration if early stopping was used)."""
+    model = model_airbnb_price()
+    try:
+        return (0, model.best_iteration + 1)
+    except AttributeError:
+        return (0, 0)  # 0 → all trees
+
+
+def get_airbnb_booster(nthread: int = None):
+    """
+    Raw XGBoost booster of the Airbnb price model for the given thread count.
+    The first one is checked against the sklearn predict path before it is used.
+    """
+    booster = airbnb_boosters.get(nthread)
+    if booster is not None:
+        return booster
+
+    with airbnb_boosters_lock:
+        if nthread not in airbnb_boosters:
+            model = model_airbnb_price()
+            booster = model.get_booster()
+            if nthread is not None:
+                booster = booster.copy()
+                booster.set_param({"nthread": nthread})
+
+            # correctness check: same log prices as model.predict(DataFrame) for all 20 Arrondissements
+            X_check = encode_airbnb_features([{"arrondissement": n, "amenities": ["Wifi"]} for n in arr_map])
+            expected = model.predict(pd.DataFrame(X_check, columns=get_airbnb_features()))
+            actual = booster.inplace_predict(X_check, iteration_range=get_airbnb_iteration_range())
+            if not np.array_equal(expected, actual):
+                raise ValueError("XGBoost inplace_predict does not match the Airbnb model's predict().")
+
+            airbnb_boosters[nthread] = booster
+    return airbnb_boosters[nthread]
+
+
+@timed("predict.airbnb")
+def predict_airbnb_log_prices(X: np.ndarray, nthread: int = None) -> np.ndarray:
+    """
+    Log nightly prices for an (N, F) feature matrix in get_airbnb_features() order.
+    Uses the booster's in-place predict on a contiguous float32 array (no DataFrame, no DMatrix).
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    inc("app_predictions_total", len(X), model="airbnb")
+    return get_airbnb_booster(nthread).inplace_predict(X, iteration_range=get_airbnb_iteration_range())
 
-# run computations
-def run_computations_airbnb(user_data: dict):
 
-    # build df used for price prediction and so on
-    df_airbnb = build_airbnb_feature_df(user_data)
+@lru_cache(maxsize=None)
+def get_cleaning_cost_coefficients():
+    """
+    (coef_bedroom, coef_bathroom, intercept) of the cleaning-cost LinearRegression.
+    Extracted once when the model is loaded and checked against sklearn's own predict.
+    """
+    model = model_cleaning_costs()
+    coef = dict(zip(model_features("cleaning"), np.asarray(model.coef_, dtype=np.float64).ravel()))
+    coefficients = (float(coef["Bedroom"]), float(coef["Bathroom"]), float(model.intercept_))
+
+    # parity check: closed form must give exactly the sklearn output (bedrooms/bathrooms 0-10)
+    grid = np.array([[b, ba] for b in range(11) for ba in range(11)], dtype=np.float64)
+    expected = model.predict(pd.DataFrame(grid, columns=model_features("cleaning")))
+    actual = cleaning_cost_formula(grid[:, 0], grid[:, 1], coefficients)
+    if not np.array_equal(expected, actual):
+        raise ValueError("Closed-form cleaning cost does not match the cleaning model's predict().")
+
+    return coefficients
+
+
+def cleaning_cost_formula(bedrooms, bathrooms, coefficients):
+    coef_bedroom, coef_bathroom, intercept = coefficients
+    X = np.column_stack([np.atleast_1d(bedrooms), np.atleast_1d(bathrooms)]).astype(np.float64)
+    # same dot product sklearn uses (X @ coef + intercept), so results are identical
+    return X @ np.array([coef_bedroom, coef_bathroom]) + intercept
+
+
+@timed("predict.cleaning")
+def predict_cleaning_costs(bedrooms, bathrooms) -> np.ndarray:
+    """Cleaning cost per cleaning for scalars or arrays of bedrooms / bathrooms."""
+    inc("app_predictions_total", np.size(bedrooms), model="cleaning")
+    return cleaning_cost_formula(bedrooms, bathrooms, get_cleaning_cost_coefficients())
+
+
+def predict_airbnb_price_and_cleaning(df_airbnb: pd.DataFrame):
+    """Returns (nightly price, cleaning cost per cleaning) as whole numbers for one feature row."""
 
     ###########################
     # PRICE PREDICTION PER NIGHT
     ###########################
     
     # prediction is in log --> transform back
-    user_price_prediction_log = model_airbnb_price.predict(df_airbnb)
+    user_price_prediction_log = predict_airbnb_log_prices(df_airbnb.to_numpy(), nthread=1)
     
     # get numeric value, because it is saved in array
     value_price_prediction_log = float(user_price_prediction_log[0])       
     value_price_prediction_log_rounded = round(value_price_prediction_log, 4)   # keep enough precision
     user_price_prediction = np.expm1(value_price_prediction_log_rounded)
-
-    # save final value as a whole number
-    st.session_state["user_price_prediction"] = int(user_price_prediction)
     
     ###########################
     # CLEANING COST PRED
     ###########################
     
-    # need to format dataset in correct way for prediction!
-    df_cleaning_costs = df_airbnb[['bedrooms', 'bathrooms_text']].copy()
-    df_cleaning_costs.columns = ['Bedroom', 'Bathroom']
-
-    # prediction is in log --> transform back
-    user_cleaning_cost_pred = model_cleaning_costs.predict(df_cleaning_costs)
-    
-    # get numeric value, because it is saved in array
-    value_cleaning_cost_prediction = float(user_cleaning_cost_pred[0])       
+    # linear model → closed form on the two columns, no DataFrame/sklearn call needed
+    value_cleaning_cost_prediction = float(
+        predict_cleaning_costs(df_airbnb["bedrooms"].to_numpy(), df_airbnb["bathrooms_text"].to_numpy())[0]
+    )
     
-    # save final value as a whole number
-    st.session_state["user_cleaning_cost_prediction"] = int(value_cleaning_cost_prediction)
+    # final values as whole numbers
+    return int(user_price_prediction), int(value_cleaning_cost_prediction)
+
+
+@timed("predict.renting")
+def predict_renting_price(df_renting: pd.DataFrame) -> float:
+    inc("app_predictions_total", len(df_renting), model="renting")
+    return float(model_renting_price().predict(df_renting)[0])
+
+
+# run computations
+@timed("run.airbnb")
+def run_computations_airbnb(user_data: dict):
+
+    # build df used for price prediction and so on
+    df_airbnb = build_airbnb_feature_df(user_data)
+
+    # keep the feature row so the impact KPIs can reuse it instead of rebuilding it
+    st.session_state["user_airbnb_feature_df"] = df_airbnb
+
+    # same listing inputs → same prediction, for every user and rerun
+    key = prediction_cache.make_key(
+        "airbnb", model_registry.file_hash("airbnb") + model_registry.file_hash("cleaning"), df_airbnb.to_numpy()
+    )
+    price, cleaning = prediction_cache.get_or_compute(key, lambda: predict_airbnb_price_and_cleaning(df_airbnb))
+
+    # save final values as whole numbers
+    st.session_state["user_price_prediction"] = price
+    st.session_state["user_cleaning_cost_prediction"] = cleaning
     
     
     
+@timed("run.renting")
 def run_computations_renting(user_data: dict):
     ###########################
     # RENTING COST PRED
     ###########################
     
-    df_renting = build_renting_feature_df(user_data)
-    
-    #predict renting price
-    
-    user_renting_price_pred = model_renting_price.predict(df_renting)
-    
-    value_pred_renting_price = float(user_renting_price_pred[0]) 
+    # inputs on the 20 x 10 rooms x furnished grid → precomputed table, no model needed
+    value_pred_renting_price = lookup_renting_price(user_data)
+
+    if value_pred_renting_price is None:
+        df_renting = build_renting_feature_df(user_data)
+        
+        #predict renting price
+        
+        key = prediction_cache.make_key("renting", model_registry.file_hash("renting"), df_renting.to_numpy())
+        value_pred_renting_price = prediction_cache.get_or_compute(
+            key, lambda: predict_renting_price(df_renting)
+        )
     
     st.session_state["user_renting_price_prediction"] = int(value_pred_renting_price)
     #print("DEBUG: ", value_pred_renting_price)
 
 
 
+###########################
+# BATCH SCORING (no Streamlit session needed - CLI, ETL jobs, services)
+###########################
+
+def renting_profile(profile: dict) -> dict:
+    """Renting inputs of a combined profile; rooms default to the stored num_rooms (bedrooms + bathrooms)."""
+    rooms = profile.get("Number of rooms renting")
+    if rooms is None:
+        rooms = profile.get("num_rooms", int(profile.get("bedrooms", 1)) + int(profile.get("bathrooms", 1)))
+    return {
+        "Number of rooms renting": rooms,
+        "arrondissement": profile.get("arrondissement", 1),
+        "furnished": profile.get("furnished", False),
+    }
+
+
+def predict_renting_prices(renting_profiles: list) -> np.ndarray:
+    """Monthly rent for N renting profiles: table lookup, one batched model call for the rows off the grid."""
+    prices = np.array([lookup_renting_price(p) for p in renting_profiles], dtype=object)
+    missing = [i for i, price in enumerate(prices) if price is None]
+    if missing:
+        X = encode_renting_features([renting_profiles[i] for i in missing])
+        inc("app_predictions_total", len(missing), model="renting")
+        prices[missing] = model_renting_price().predict(pd.DataFrame(X, columns=rent_features))
+    return prices.astype(np.float64)
+
+
+@timed("score.batch")
+def score_profiles(profiles: list, nthread: int = None, out: np.ndarray = None) -> dict:
+    """
+    Nightly price, cleaning cost and monthly rent for N profiles (airbnb fields plus the
+    optional renting fields) with one predict per model. Same whole numbers as
+    run_computations_airbnb / run_computations_renting give for a single profile.
+    Returns {"nightly_price", "cleaning_cost", "monthly_rent"} as int64 arrays.
+    Pass a preallocated (N, F) float32 array as out to reuse the encoding buffer.
+    """
+    if not profiles:
+        empty = np.zeros(0, dtype=np.int64)
+        return {"nightly_price": empty, "cleaning_cost": empty, "monthly_rent": empty}
+
+    X = encode_airbnb_features(profiles, out=out)
+    nightly_price, cleaning_cost = predict_airbnb_batch(X, nthread=nthread)
+    monthly_rent = predict_renting_prices([renting_profile(p) for p in profiles])
+
+    return {
+        "nightly_price": nightly_price,
+        "cleaning_cost": cleaning_cost,
+        "monthly_rent": monthly_rent.astype(np.int64),  # int() truncation like the single-profile path
+    }
+
+
+def predict_airbnb_batch(X: np.ndarray, nthread: int = None):
+    """(nightly prices, cleaning costs) as int64 arrays for an encoded (N, F) matrix, like predict_airbnb_price_and_cleaning."""
+    schema = get_airbnb_schema()
+
+    # same rounding as predict_airbnb_price_and_cleaning (python round on the float log price)
+    log_prices = predict_airbnb_log_prices(X, nthread=nthread)
+    nightly_price = np.expm1([round(float(v), 4) for v in log_prices])
+
+    cleaning_cost = predict_cleaning_costs(X[:, schema["col_idx"]["bedrooms"]], X[:, schema["col_idx"]["bathrooms_text"]])
+    return nightly_price.astype(np.int64), cleaning_cost.astype(np.int64)
+
+
+def predict_heatmap_batch(X: np.ndarray, nthread: int = None) -> np.ndarray:
+    """
+    (N, 20) prices of N encoded listings in every Arrondissement (column i = Arrondissement i + 1),
+    the batched form of predict_heatmap_prices: one predict over N * 20 rows.
+    """
+    arr_idx = [get_airbnb_schema()["arr_idx"][n] for n in range(1, 21)]
+    X_all_arr = np.repeat(X, 20, axis=0)
+    X_all_arr[:, arr_idx] = np.tile(np.eye(20, dtype=X_all_arr.dtype), (len(X), 1))
+    price_log = predict_airbnb_log_prices(X_all_arr, nthread=nthread)
+    return np.expm1(price_log.astype(float)).astype(np.int64).reshape(len(X), 20)
+
+
+def predict_price_scenarios_batch(X: np.ndarray, scenarios: dict, nthread: int = None) -> list:
+    """Batched predict_price_scenarios: one {name: price} dict per encoded listing, one predict for all."""
+    names = list(scenarios)
+    if not names or not len(X):
+        return [{} for _ in range(len(X))]
+
+    col_index = get_airbnb_schema()["col_idx"]
+    X_scenarios = np.repeat(X, len(names), axis=0)
+    for offset, name in enumerate(names):
+        for col, value in scenarios[name].items():
+            if col in col_index:
+                X_scenarios[offset::len(names), col_index[col]] = value
+
+    prices = np.expm1(predict_airbnb_log_prices(X_scenarios, nthread=nthread).astype(float)).reshape(len(X), len(names))
+    return [{name: int(price) for name, price in zip(names, row)} for row in prices]
+
+
+def iter_scored_profiles(profiles, batch_size: int = 1000, nthread: int = None):
+    """
+    Lazily scores any iterable of profile dicts (list, DB cursor, JSONL reader, ...).
+
+    Rows are pulled in micro-batches of batch_size and scored with score_profiles, one
+    record per profile is yielded in input order: a new dict with the profile fields plus
+    nightly_price, cleaning_cost and monthly_rent (plain ints). Only one batch is held in
+    memory and its encoding buffer is reused, so memory does not grow with the input.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+
+    buffer = np.zeros((batch_size, len(get_airbnb_features())), dtype=np.float32)
+    profiles = iter(profiles)
+    while True:
+        batch = list(islice(profiles, batch_size))
+        if not batch:
+            return
+        scores = score_profiles(batch, nthread=nthread, out=buffer[:len(batch)])
+        columns = zip(scores["nightly_price"].tolist(), scores["cleaning_cost"].tolist(), scores["monthly_rent"].tolist())
+        for profile, (price, cleaning, rent) in zip(batch, columns):
+            yield {**profile, "nightly_price": price, "cleaning_cost": cleaning, "monthly_rent": rent}
+
+
 # NEUE FUNKTION IN computations.py
 
 # Map for generating the official 5-digit INSEE code (used for GeoJSON matching)
@@ -291,50 +575,50 @@ arrondissement_names = {
     16: "16e Ardt - Passy", 17: "17e Ardt - Batignolles-Monceau", 18: "18e Ardt - Buttes-Montmartre", 19: "19e Ardt - Buttes-Chaumont", 20: "20e Ardt - Ménilmontant",
 }
 
+@timed("heatmap")
 def predict_all_arrondissement_prices(user_data: dict) -> pd.DataFrame:
     """
     Predicts the Airbnb price for the current listing configuration
     across all 20 Paris Arrondissements for heatmap visualization.
     """
     
-    # 1. Create a base feature DataFrame using current user input
-    base_df = build_airbnb_feature_df(user_data)
-    all_arr_data = []
+    # 1. Encode the current user input once
+    base_row = encode_airbnb_features([user_data])
+
+    key = prediction_cache.make_key("airbnb_heatmap", model_registry.file_hash("airbnb"), base_row)
+    df_map_prices = prediction_cache.get_or_compute(key, lambda: predict_heatmap_prices(base_row))
+
+    # copy so callers cannot modify the cached frame
+    return df_map_prices.copy()
+
+
+def predict_heatmap_prices(base_row: np.ndarray) -> pd.DataFrame:
+    """Scores one encoded listing row in all 20 Arrondissements with a single predict."""
     
-    # Map for the One-Hot column names (as used by the ML model)
-    arr_map = {
-        1: "Arrondissement_1er", 2: "Arrondissement_2e", 3: "Arrondissement_3e", 4: "Arrondissement_4e", 5: "Arrondissement_5e",
-        6: "Arrondissement_6e", 7: "Arrondissement_7e", 8: "Arrondissement_8e", 9: "Arrondissement_9e", 10: "Arrondissement_10e",
-        11: "Arrondissement_11e", 12: "Arrondissement_12e", 13: "Arrondissement_13e", 14: "Arrondissement_14e", 15: "Arrondissement_15e",
-        16: "Arrondissement_16e", 17: "Arrondissement_17e", 18: "Arrondissement_18e", 19: "Arrondissement_19e", 20: "Arrondissement_20e",
-    }
-    arr_cols = list(arr_map.values())
+    arr_nums = list(range(1, 21))
+    arr_idx = [get_airbnb_schema()["arr_idx"][n] for n in arr_nums]
 
-    # 2. Loop through all 20 Arrondissements
-    for arr_num in range(1, 21):
-        
-        # Clone base DF and zero out all existing Arrondissement columns
-        df_single_arr = base_df.copy()
-        for col in arr_cols:
-            df_single_arr[col] = 0
-            
-        # Set the current Arrondissement's One-Hot column to 1
-        current_arr_col = arr_map.get(arr_num)
-        if current_arr_col:
-            df_single_arr[current_arr_col] = 1
-        
-        # Predict the Log Price using the ML model
-        price_log = model_airbnb_price.predict(df_single_arr)
-        
-        # Transform back from log scale and round to integer
-        price_pred = np.expm1(float(price_log[0]))
-        
-        all_arr_data.append({
+    # 2. Build one 20-row feature matrix: the user's listing repeated once per Arrondissement
+    X_all_arr = np.repeat(base_row, len(arr_nums), axis=0)
+
+    # Zero out all Arrondissement columns and set row i to Arrondissement i (identity matrix)
+    X_all_arr[:, arr_idx] = np.eye(len(arr_nums), dtype=X_all_arr.dtype)
+
+    # 3. Predict the Log Price for all 20 rows in a single model call
+    price_log = predict_airbnb_log_prices(X_all_arr, nthread=1)
+
+    # Transform back from log scale (once for the whole batch)
+    price_pred = np.expm1(price_log.astype(float))
+
+    all_arr_data = [
+        {
             "Arrondissement_Code": str(insee_map.get(arr_num)), 
-            "Avg_Price_Apt": int(price_pred),
+            "Avg_Price_Apt": int(price),
             "Arrondissement_Number": arr_num, 
             "Arrondissement_Name": arrondissement_names.get(arr_num) # New for heat-map
-        })
+        }
+        for arr_num, price in zip(arr_nums, price_pred)
+    ]
         
     return pd.DataFrame(all_arr_data)
 
@@ -344,60 +628,82 @@ def predict_all_arrondissement_prices(user_data: dict) -> pd.DataFrame:
 # Define Median Arrondissement for benchmarking (e.g., Arrondissement 10 is often near the median)
 MEDIAN_ARR_NUM = 10 
 
-def calculate_price_impact_kpis(user_data: dict, current_predicted_price: int):
+
+def arrondissement_override(arr_num: int) -> dict:
+    """
+    Returns the one-hot overrides that move a listing into the given Arrondissement.
+    """
+    return {col: int(num == arr_num) for num, col in arr_map.items()}
+
+
+@lru_cache(maxsize=None)
+def get_price_impact_scenarios() -> dict:
+    """Benchmark scenarios used for the price contribution waterfall (name -> feature overrides)."""
+    airbnb_features = get_airbnb_features()
+    return {
+        # SCENARIO 1: the USER's specific listing, but placed in the median location (Location Impact Benchmark)
+        "median_location": arrondissement_override(MEDIAN_ARR_NUM),
+
+        # SCENARIO 2: minimal baseline listing (1 bed, 1 bath, no superhost, in median Arrondissement)
+        # Also set amenity flags to zero for the baseline comparison (Assuming amenity flags start at index 30 in airbnb_features)
+        "baseline": {
+            **arrondissement_override(MEDIAN_ARR_NUM),
+            "host_is_superhost": 0,
+            "host_listings_count": 1,
+            "bedrooms": 1,
+            "bathrooms_text": 1,
+            **{col: 0 for col in airbnb_features[29:]},
+        },
+    }
+
+
+def predict_price_scenarios(base_df: pd.DataFrame, scenarios: dict) -> dict:
+    """
+    Scores any number of what-if scenarios for one listing in a single batched predict.
+
+    base_df is the one-row feature DataFrame of the user's listing and scenarios maps a
+    scenario name to a dict of feature overrides ({column: value}). Returns {name: price}.
+    """
+    names = list(scenarios)
+    if not names:
+        return {}
+
+    # One row per scenario, all starting from the user's base vector
+    X_scenarios = np.repeat(base_df.to_numpy(dtype=np.float32), len(names), axis=0)
+
+    col_index = {col: i for i, col in enumerate(base_df.columns)}
+    for row, name in enumerate(names):
+        for col, value in scenarios[name].items():
+            if col in col_index:
+                X_scenarios[row, col_index[col]] = value
+
+    # Predict the log prices for all scenarios at once and transform back
+    price_log = predict_airbnb_log_prices(X_scenarios, nthread=1)
+    prices = np.expm1(price_log.astype(float))
+
+    return {name: int(price) for name, price in zip(names, prices)}
+
+
+@timed("impact_kpis")
+def calculate_price_impact_kpis(user_data: dict, current_predicted_price: int, base_df: pd.DataFrame = None):
     """
     Calculates key price impact metrics by predicting the price for specific
     benchmark scenarios based on the current user input.
+
+    Pass the feature row already built by run_computations_airbnb as base_df to skip rebuilding it.
     """
     
     # Get the base feature DataFrame (which already contains user's amenities, bedrooms, etc.)
-    base_df = build_airbnb_feature_df(user_data)
-    
-    # 1. --- SCENARIO 1: PRICE IN MEDIAN ARRONDISSEMENT (Location Impact Benchmark) ---
-    # We want to see the price of the USER's specific listing, but placed in a median location (Arrondissement 10).
-    
-    # Map for Arrondissement One-Hot columns
-    arr_map = {
-        1: "Arrondissement_1er", 2: "Arrondissement_2e", 3: "Arrondissement_3e", 4: "Arrondissement_4e", 5: "Arrondissement_5e",
-        6: "Arrondissement_6e", 7: "Arrondissement_7e", 8: "Arrondissement_8e", 9: "Arrondissement_9e", 10: "Arrondissement_10e",
-        11: "Arrondissement_11e", 12: "Arrondissement_12e", 13: "Arrondissement_13e", 14: "Arrondissement_14e", 15: "Arrondissement_15e",
-        16: "Arrondissement_16e", 17: "Arrondissement_17e", 18: "Arrondissement_18e", 19: "Arrondissement_19e", 20: "Arrondissement_20e",
-    }
-    
-    # Prepare the DF: Set all Arrondissement flags to 0
-    df_location_neutral = base_df.copy()
-    for col_name in arr_map.values():
-        df_location_neutral[col_name] = 0
-        
-    # Set the Median Arrondissement flag to 1
-    median_arr_col = arr_map.get(MEDIAN_ARR_NUM)
-    if median_arr_col:
-        df_location_neutral[median_arr_col] = 1
-
-    # Predict the price for the user's listing if it were in the median location
-    price_log_median_location = model_airbnb_price.predict(df_location_neutral)
-    median_location_price = int(np.expm1(float(price_log_median_location[0])))
-    
-    
-    # 2. --- SCENARIO 2: BASELINE CITY PRICE (Listing Quality Impact Benchmark) ---
-    # We create a minimal baseline listing (1 bed, 1 bath, no superhost, in median Arrondissement)
-    
-    # Reset critical features in a copy of the median location DF
-    df_baseline = df_location_neutral.copy()
-    
-    # Assuming baseline is the minimum meaningful input:
-    df_baseline["host_is_superhost"] = 0
-    df_baseline["host_listings_count"] = 1
-    df_baseline["bedrooms"] = 1
-    df_baseline["bathrooms_text"] = 1
-    
-    # Also set amenity flags to zero for the baseline comparison (Assuming amenity flags start at index 30 in airbnb_features)
-    for i in range(29, len(airbnb_features)):
-        df_baseline[airbnb_features[i]] = 0
-
-    # Predict the price for the minimum baseline listing
-    price_log_baseline = model_airbnb_price.predict(df_baseline)
-    baseline_price = int(np.expm1(float(price_log_baseline[0])))
+    if base_df is None:
+        base_df = build_airbnb_feature_df(user_data)
+
+    # 1. + 2. --- SCORE ALL BENCHMARK SCENARIOS IN ONE MODEL CALL (cached across sessions) ---
+    key = prediction_cache.make_key("airbnb_impact", model_registry.file_hash("airbnb"), base_df.to_numpy())
+    scenario_prices = prediction_cache.get_or_compute(
+        key, lambda: predict_price_scenarios(base_df, get_price_impact_scenarios())
+    )
+    median_location_price = scenario_prices["median_location"]
+    baseline_price = scenario_prices["baseline"]
     
     
     # 3. --- CALCULATE FINAL KPIS ---
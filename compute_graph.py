@@ -0,0 +1,47 @@
+import copy
+
+# small dependency graph for page computations
+# each node declares the keys it reads (page inputs or other nodes) and is only
+# recomputed when one of those values changed since its last run
+
+
+class ComputeGraph:
+    """Nodes are evaluated in dependency order; unchanged inputs → the stored value is reused."""
+
+    def __init__(self):
+        self.nodes = {}      # name -> (input keys, function)
+        self.values = {}     # name -> last computed value
+        self._inputs = {}    # name -> input values of the last computation
+        self.recomputed = []  # nodes that ran during the last evaluate()
+
+    def node(self, name: str, inputs: list, fn):
+        """Register fn(*inputs) as node name. Nodes must be added after the nodes they depend on."""
+        if name in self.nodes:
+            raise ValueError(f"Node '{name}' is already defined.")
+        self.nodes[name] = (list(inputs), fn)
+        return self
+
+    def evaluate(self, inputs: dict) -> dict:
+        """Returns inputs plus every node value, recomputing only the nodes whose inputs changed."""
+        values = dict(inputs)
+        self.recomputed = []
+
+        for name, (keys, fn) in self.nodes.items():
+            try:
+                args = tuple(values[key] for key in keys)
+            except KeyError as e:
+                raise KeyError(f"Node '{name}' needs '{e.args[0]}', which is neither an input nor an earlier node.")
+
+            if name not in self.values or self._inputs[name] != args:
+                self.values[name] = fn(*args)
+                self._inputs[name] = copy.deepcopy(args)  # inputs can be mutable (amenity lists)
+                self.recomputed.append(name)
+            values[name] = self.values[name]
+
+        return values
+
+    def invalidate(self, name: str = None):
+        """Force a node (or every node) to recompute on the next evaluate()."""
+        for key in [name] if name else list(self.values):
+            self.values.pop(key, None)
+            self._inputs.pop(key, None)
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import threading
+import atexit
+from collections import deque
+
+# opt-in capture of the feature rows sent to the models (replaces the old debug csv dumps)
+# switched on with the environment variable FEATURE_CAPTURE=1, off by default
+
+CAPTURE_DIR = os.environ.get("FEATURE_CAPTURE_DIR", "data/feature_capture")
+CAPTURE_MAX_ROWS = int(os.environ.get("FEATURE_CAPTURE_MAX_ROWS", 10000))     # size of the in-memory ring buffer
+CAPTURE_MAX_BYTES = int(os.environ.get("FEATURE_CAPTURE_MAX_BYTES", 10_000_000))  # rotate file after ~10 MB
+CAPTURE_BACKUPS = int(os.environ.get("FEATURE_CAPTURE_BACKUPS", 5))          # number of rotated files to keep
+CAPTURE_FLUSH_SECONDS = float(os.environ.get("FEATURE_CAPTURE_FLUSH_SECONDS", 2.0))
+
+
+class FeatureCaptureSink:
+    """
+    Bounded in-memory ring buffer of captured feature rows, flushed by a background
+    thread to an append-only JSON-lines file per model that is rotated by size.
+    If the buffer is full the oldest rows are dropped (counted in self.dropped).
+    """
+
+    def __init__(self, directory=CAPTURE_DIR, max_rows=CAPTURE_MAX_ROWS, max_bytes=CAPTURE_MAX_BYTES,
+                 backups=CAPTURE_BACKUPS, flush_seconds=CAPTURE_FLUSH_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_seconds = flush_seconds
+        self.buffer = deque(maxlen=max_rows)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="feature-capture", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def capture(self, model_name: str, columns: list, rows, session: str = None):
+        """Queue feature rows (one list of values per row) - never touches the disk."""
+        ts = time.time()
+        with self._lock:
+            for row in rows:
+                if len(self.buffer) == self.buffer.maxlen:
+                    self.dropped += 1
+                self.buffer.append((model_name, ts, session, columns, [float(v) for v in row]))
+
+    def flush(self):
+        """Drain the buffer and append every row to its model's capture file."""
+        with self._lock:
+            pending = list(self.buffer)
+            self.buffer.clear()
+        if not pending:
+            return
+
+        lines_per_model = {}
+        for model_name, ts, session, columns, values in pending:
+            record = {"ts": ts, "session": session, "features": dict(zip(columns, values))}
+            lines_per_model.setdefault(model_name, []).append(json.dumps(record, ensure_ascii=False))
+
+        os.makedirs(self.directory, exist_ok=True)
+        for model_name, lines in lines_per_model.items():
+            path = os.path.join(self.directory, f"{model_name}.jsonl")
+            self._rotate_if_needed(path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+    def _rotate_if_needed(self, path):
+        # features.jsonl -> features.jsonl.1 -> ... -> features.jsonl.<backups> (oldest is deleted)
+        if not os.path.exists(path) or os.path.getsize(path) < self.max_bytes:
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError:
+                pass  # capture is best effort, never break the app
+
+
+# process-wide sink, only created when capture is switched on
+capture_sink = FeatureCaptureSink().start() if os.environ.get("FEATURE_CAPTURE") == "1" else None
+
+
+def capture_features(model_name: str, columns: list, rows, session: str = None):
+    """Record feature rows if capture is enabled, otherwise do nothing."""
+    if capture_sink is not None:
+        capture_sink.capture(model_name, columns, rows, session)
@@ -0,0 +1,91 @@
+import json
+import os
+import pickle
+from functools import lru_cache
+
+# feature-schema manifest stored next to the .sav files
+# lets the UI get feature order and amenity labels without unpickling any model
+# regenerate after retraining a model with:  python feature_schema.py
+
+SCHEMA_PATH = "ml_models/feature_schema.json"
+
+
+#Cleaning the columns names for better UX
+def clean_amenity_name(col):
+    # Convert model column name to a clean user-friendly label
+    x = col.replace("amenity__", "").rstrip("_")
+    x = x.replace("_", " ")
+    x = x.replace("u2013", "–")
+    return x.strip().title()
+
+def build_amenity_maps(airbnb_features):
+    amenity_cols = [c for c in airbnb_features if c.startswith("amenity__")]
+    label_to_col = {clean_amenity_name(c): c for c in amenity_cols}
+    col_to_label = {c: clean_amenity_name(c) for c in amenity_cols}
+    return label_to_col, col_to_label
+
+
+def generate_manifest(path: str = SCHEMA_PATH) -> dict:
+    """Unpickle every model once and write its feature schema + file hash to path."""
+    from model_registry import MODEL_PATHS, file_sha256
+
+    models = {}
+    for name, model_path in MODEL_PATHS.items():
+        with open(model_path, "rb") as f:
+            model = pickle.load(f)
+        models[name] = {
+            "file": model_path,
+            "sha256": file_sha256(model_path),
+            "features": [str(c) for c in model.feature_names_in_],
+        }
+
+    airbnb_features = models["airbnb"]["features"]
+    rent_features = models["renting"]["features"]
+    _, amenity_col_to_label = build_amenity_maps(airbnb_features)
+
+    manifest = {
+        "models": models,
+        "amenity_col_to_label": amenity_col_to_label,
+        "one_hot_groups": {
+            "airbnb": {
+                "arrondissement": [c for c in airbnb_features if c.startswith("Arrondissement_")],
+                "room_type": [c for c in airbnb_features if c.startswith("room_")],
+                "amenities": list(amenity_col_to_label),
+            },
+            "renting": {
+                "arrondissement": [c for c in rent_features if c.startswith("Arrondissement_")],
+                "renting_type": [c for c in rent_features if c.startswith("Type de location")],
+            },
+        },
+    }
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
+    load_manifest.cache_clear()
+    return manifest
+
+
+@lru_cache(maxsize=None)
+def load_manifest(path: str = SCHEMA_PATH) -> dict:
+    """Read the manifest (once per process). Plain JSON - no pickle involved."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Feature schema '{path}' not found - run `python feature_schema.py` to generate it.")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def model_features(name: str) -> list:
+    """Feature order expected by the given model."""
+    return load_manifest()["models"][name]["features"]
+
+
+def expected_model_hash(name: str) -> str:
+    """SHA-256 the model file had when the manifest was generated."""
+    return load_manifest()["models"][name]["sha256"]
+
+
+if __name__ == "__main__":
+    manifest = generate_manifest()
+    for name, info in manifest["models"].items():
+        print(f"{name}: {len(info['features'])} features, sha256 {info['sha256'][:12]}...")
+    print(f"Schema written to {SCHEMA_PATH}")
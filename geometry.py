@@ -0,0 +1,101 @@
+import os
+import json
+import threading
+import numpy as np
+
+# arrondissement polygons for the map: paris.geojson is parsed once per process and a
+# simplified copy (fewer points, rounded coordinates, only the id property) is sent to the browser
+
+GEOJSON_PATH = "data/paris.geojson"
+GEOJSON_ID_PROPERTY = "c_arinsee"
+
+# simplification tolerance in degrees (0.00005° ≈ 5 m in Paris), 0 = full resolution
+SIMPLIFY_TOLERANCE = float(os.environ.get("GEOJSON_SIMPLIFY_TOLERANCE", 0.00005))
+
+
+def simplify_line(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker simplification of an (N, 2) array of lon/lat points (first and last are kept)."""
+    if tolerance <= 0 or len(points) < 3:
+        return points
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        segment = points[start + 1:end]
+        ab = b - a
+        length = np.hypot(ab[0], ab[1])
+        if length == 0:
+            dist = np.hypot(segment[:, 0] - a[0], segment[:, 1] - a[1])
+        else:
+            dist = np.abs(ab[0] * (segment[:, 1] - a[1]) - ab[1] * (segment[:, 0] - a[0])) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return points[keep]
+
+
+def simplify_ring(ring: list, tolerance: float) -> list:
+    """Simplify a closed polygon ring, falling back to the original if it would collapse."""
+    points = np.asarray(ring, dtype=float)
+    simplified = simplify_line(points, tolerance)
+    if len(simplified) < 4:
+        simplified = points
+    return np.round(simplified, 6).tolist()
+
+
+class ArrondissementGeometry:
+    """Parses the GeoJSON once and serves (simplified) arrondissement polygons keyed by c_arinsee."""
+
+    def __init__(self, path: str = GEOJSON_PATH):
+        self.path = path
+        self._features = None
+        self._simplified = {}
+        self._lock = threading.Lock()
+
+    def features_by_id(self) -> dict:
+        """Full-resolution features, {c_arinsee: feature} - parsed on first use only."""
+        if self._features is None:
+            with self._lock:
+                if self._features is None:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        geojson_data = json.load(f)
+                    self._features = {
+                        feature["properties"][GEOJSON_ID_PROPERTY]: feature
+                        for feature in geojson_data["features"]
+                    }
+        return self._features
+
+    def simplified(self, tolerance: float = None) -> dict:
+        """FeatureCollection with simplified polygons, computed once per tolerance."""
+        tolerance = SIMPLIFY_TOLERANCE if tolerance is None else tolerance
+        if tolerance not in self._simplified:
+            features = []
+            for arr_id, feature in self.features_by_id().items():
+                geometry = feature["geometry"]
+                if geometry["type"] == "Polygon":
+                    coordinates = [simplify_ring(ring, tolerance) for ring in geometry["coordinates"]]
+                else:  # MultiPolygon
+                    coordinates = [[simplify_ring(ring, tolerance) for ring in polygon] for polygon in geometry["coordinates"]]
+                features.append({
+                    "type": "Feature",
+                    "id": arr_id,
+                    "properties": {GEOJSON_ID_PROPERTY: arr_id},
+                    "geometry": {"type": geometry["type"], "coordinates": coordinates},
+                })
+            with self._lock:
+                self._simplified[tolerance] = {"type": "FeatureCollection", "features": features}
+        return self._simplified[tolerance]
+
+
+# process-wide geometry used by the Airbnb page map
+arrondissement_geometry = ArrondissementGeometry()
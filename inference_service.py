@@ -0,0 +1,370 @@
+import sys
+import json
+import math
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from computations import (
+    room_categories, renting_profile, encode_airbnb_features, predict_airbnb_batch, predict_renting_prices,
+    predict_heatmap_batch, predict_price_scenarios_batch, get_price_impact_scenarios, insee_map, arrondissement_names,
+)
+from model_registry import model_registry
+from timing import span
+
+# local JSON inference service for other internal tools (no Streamlit session involved)
+#
+#   python inference_service.py                              # http://127.0.0.1:8765
+#   python inference_service.py --port 9000 --max-batch 512 --max-wait-ms 0
+#
+#   curl -s localhost:8765/airbnb -d '{"arrondissement": 4, "bedrooms": 2, "amenities": ["Wifi"]}'
+#
+# endpoints (POST, one listing as JSON object, same fields as a stored profile):
+#   /airbnb   → nightly_price, cleaning_cost            (run_computations_airbnb)
+#   /renting  → monthly_rent                            (run_computations_renting)
+#   /heatmap  → price in each of the 20 arrondissements (predict_all_arrondissement_prices)
+#   /impact   → location / quality impact KPIs          (calculate_price_impact_kpis)
+#   GET /health → model status and batch statistics
+#
+# requests that arrive within --max-wait-ms of each other are gathered per endpoint into one
+# batched model call, run on a single model thread so the event loop keeps accepting requests.
+# while a batch runs the next one fills up, so batches grow with the load instead of the
+# requests queueing for one predict each.
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT_MS = 2.0
+MAX_BODY_BYTES = 1_000_000
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+# ------------------------------------------------------------
+# Request validation (JSON object → profile dict)
+# ------------------------------------------------------------
+BOOL_FIELDS = ("host_is_superhost", "host_identity_verified", "furnished")
+
+# integer fields and their accepted range (anything outside is no real listing and could
+# overflow the float32 feature matrix)
+INT_RANGES = {
+    "host_listings_count": (0, 10_000),
+    "bathrooms": (0, 50),
+    "bedrooms": (0, 50),
+    "arrondissement": (1, 20),
+}
+
+# numeric fields that may be fractional
+NUMBER_RANGES = {
+    "Number of rooms renting": (0, 1_000),
+    "current_price": (-1_000_000, 1_000_000),
+}
+
+
+def parse_listing(data) -> dict:
+    """
+    Checks the fields the models use; raises ValueError with a message for the client.
+    Every value that passes can be encoded, so one request can't break a whole batch.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+
+    profile = dict(data)
+    for field in BOOL_FIELDS:
+        if field in profile and not isinstance(profile[field], (bool, int)):
+            raise ValueError(f"{field} must be a boolean")
+    for field, (low, high) in INT_RANGES.items():
+        if field not in profile:
+            continue
+        value = profile[field]
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"{field} must be an integer")
+        if not low <= value <= high:
+            raise ValueError(f"{field} must be between {low} and {high}")
+    for field, (low, high) in NUMBER_RANGES.items():
+        value = profile.get(field)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{field} must be a number")
+        if not (math.isfinite(value) and low <= value <= high):  # json.loads accepts NaN / Infinity
+            raise ValueError(f"{field} must be a finite number between {low} and {high}")
+
+    if profile.get("room_type", room_categories[0]) not in room_categories:
+        raise ValueError(f"room_type must be one of {room_categories}")
+    amenities = profile.get("amenities", [])
+    if not isinstance(amenities, list) or not all(isinstance(a, str) for a in amenities):
+        raise ValueError("amenities must be a list of strings")
+    return profile
+
+
+# ------------------------------------------------------------
+# Batched endpoint functions (list of profiles → list of JSON results, same order)
+# ------------------------------------------------------------
+def airbnb_batch(profiles: list) -> list:
+    nightly_price, cleaning_cost = predict_airbnb_batch(encode_airbnb_features(profiles))
+    return [
+        {"nightly_price": price, "cleaning_cost": cleaning}
+        for price, cleaning in zip(nightly_price.tolist(), cleaning_cost.tolist())
+    ]
+
+
+def renting_batch(profiles: list) -> list:
+    prices = predict_renting_prices([renting_profile(p) for p in profiles])
+    return [{"monthly_rent": int(price)} for price in prices]
+
+
+def heatmap_batch(profiles: list) -> list:
+    prices = predict_heatmap_batch(encode_airbnb_features(profiles))
+    return [
+        {
+            "arrondissements": [
+                {
+                    "Arrondissement_Number": arr_num,
+                    "Arrondissement_Code": str(insee_map[arr_num]),
+                    "Arrondissement_Name": arrondissement_names[arr_num],
+                    "Avg_Price_Apt": price,
+                }
+                for arr_num, price in zip(range(1, 21), row)
+            ]
+        }
+        for row in prices.tolist()
+    ]
+
+
+def impact_batch(profiles: list) -> list:
+    X = encode_airbnb_features(profiles)
+    nightly_price, _ = predict_airbnb_batch(X)
+    scenario_prices = predict_price_scenarios_batch(X, get_price_impact_scenarios())
+
+    results = []
+    for profile, price, scenarios in zip(profiles, nightly_price.tolist(), scenario_prices):
+        # the client may pass the price it shows (like the app passes its prediction)
+        current_price = profile.get("current_price", price)
+        results.append({
+            "location_impact": current_price - scenarios["median_location"],
+            "quality_impact": scenarios["median_location"] - scenarios["baseline"],
+            "median_location_price": scenarios["median_location"],
+            "baseline_price": scenarios["baseline"],
+        })
+    return results
+
+
+ENDPOINTS = {
+    "/airbnb": airbnb_batch,
+    "/renting": renting_batch,
+    "/heatmap": heatmap_batch,
+    "/impact": impact_batch,
+}
+
+
+# ------------------------------------------------------------
+# Micro-batching
+# ------------------------------------------------------------
+class MicroBatcher:
+    """Collects the requests of one endpoint and scores them together on the model thread."""
+
+    def __init__(self, name: str, fn, executor, max_batch: int, max_wait: float):
+        self.name = name
+        self.fn = fn
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    async def submit(self, profile: dict):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((profile, future))
+        return await future
+
+    async def collect(self) -> list:
+        """First waiting request, plus everything arriving within max_wait (up to max_batch)."""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.collect()
+            self.requests += len(batch)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+            try:
+                results = await loop.run_in_executor(self.executor, self.score, [profile for profile, _ in batch])
+            except Exception:
+                # a request parse_listing didn't catch → score one by one, only that request fails
+                await self.score_one_by_one(batch)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():  # client may have disconnected
+                    future.set_result(result)
+
+    async def score_one_by_one(self, batch: list):
+        loop = asyncio.get_running_loop()
+        for profile, future in batch:
+            try:
+                result = (await loop.run_in_executor(self.executor, self.score, [profile]))[0]
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(result)
+
+    def score(self, profiles: list) -> list:
+        with span(f"service.{self.name}"):
+            return self.fn(profiles)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
+
+
+# ------------------------------------------------------------
+# HTTP/1.1 (keep-alive, JSON bodies)
+# ------------------------------------------------------------
+class InferenceService:
+    def __init__(self, max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        # one model thread: XGBoost parallelizes a batch itself and releases the GIL meanwhile
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self.batchers = {
+            path: MicroBatcher(path.strip("/"), fn, self.executor, max_batch, max_wait_ms / 1000)
+            for path, fn in ENDPOINTS.items()
+        }
+        self._tasks = []
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        # load the models before the first request instead of during it
+        await asyncio.get_running_loop().run_in_executor(self.executor, warm_up_models)
+        self._tasks = [asyncio.create_task(batcher.run()) for batcher in self.batchers.values()]
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def dispatch(self, method: str, path: str, body: bytes):
+        path = path.split("?")[0]
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, {
+                "status": "ok",
+                "models": model_registry.status(),
+                "endpoints": {p.strip("/"): b.stats() for p, b in self.batchers.items()},
+            }
+
+        batcher = self.batchers.get(path)
+        if batcher is None:
+            return 404, {"error": f"unknown endpoint {path}", "endpoints": list(ENDPOINTS) + ["/health"]}
+        if method != "POST":
+            return 405, {"error": "use POST with a JSON body"}
+
+        try:
+            profile = parse_listing(json.loads(body or b"null"))
+        except ValueError as e:  # includes json.JSONDecodeError
+            return 400, {"error": str(e)}
+
+        try:
+            return 200, await batcher.submit(profile)
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    self.write_response(writer, 413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"}, keep_alive=False)
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method, path, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self.write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # malformed request or client gone → drop the connection
+        finally:
+            writer.close()
+
+    @staticmethod
+    def write_response(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+        )
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+
+def warm_up_models():
+    for name in model_registry.paths:
+        model_registry.get(name)
+    airbnb_batch([{}])  # booster parity check and cleaning coefficients
+
+
+async def serve(host: str, port: int, max_batch: int, max_wait_ms: float):
+    service = InferenceService(max_batch, max_wait_ms)
+    server = await service.start(host, port)
+    print(f"Inference service on http://{host}:{port} (max batch {max_batch}, window {max_wait_ms} ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Local JSON inference service for the pricing models.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="requests per batched model call")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="how long a batch waits for more requests")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from profile_store import ProfileStore
+
+# concurrent-session load generator
+#
+#   python loadtest.py                                  # 1, 2, 4, 8 sessions, 20 s each
+#   python loadtest.py --levels 1 4 16 --duration 30
+#
+# starts a local `streamlit run main.py` (one app process, like production) on a temporary
+# profiles database filled with generated users. every simulated user is a websocket session
+# speaking the browser protocol: it logs in through the login form and then clicks through the
+# Airbnb, Renting and Comparison sidebars. latency = rerun request → script finished.
+# (AppTest can't be used here: its runs patch process-wide state and can't overlap.)
+
+PAGES = ["Airbnb", "Renting", "Comparison"]
+
+# chance that a step switches page instead of changing a widget
+PAGE_SWITCH_PROBABILITY = 0.2
+
+# widget interactions per page: (widget label or label prefix, random value)
+INTERACTIONS = {
+    "Airbnb": [
+        ("Bedrooms", lambda rng: rng.randint(1, 5)),
+        ("Arrondissement", lambda rng: rng.randint(1, 20)),
+        ("Host is Superhost", lambda rng: rng.random() < 0.5),
+    ],
+    "Renting": [
+        ("Arrondissement", lambda rng: rng.randint(1, 20)),
+        ("Number of Rooms", lambda rng: rng.randint(1, 10)),
+        ("Is your object furnished", lambda rng: rng.random() < 0.5),
+    ],
+    "Comparison": [
+        ("Expected occupancy", lambda rng: float(rng.randint(10, 100))),
+        ("Arrondissement (1-20)", lambda rng: rng.randint(1, 20)),
+    ],
+}
+
+# WidgetState field per element type
+VALUE_FIELDS = {
+    "number_input": "double_value",
+    "checkbox": "bool_value",
+    "radio": "string_value",
+    "text_input": "string_value",
+}
+
+
+# ------------------------------------------------------------
+# Server / users
+# ------------------------------------------------------------
+def create_load_users(db_path: str, n: int, seed: int = 42) -> list:
+    """Generated users load_user_0 ... load_user_{n-1} in the temporary profile store."""
+    from benchmark import make_airbnb_profiles
+
+    store = ProfileStore(db_path)
+    usernames = []
+    for i, listing in enumerate(make_airbnb_profiles(n, seed)):
+        username = f"load_user_{i}"
+        store.create_profile(username, {
+            "email": f"{username}@example.com",
+            "password": "load",
+            **listing,
+            "num_rooms": listing["bedrooms"] + listing["bathrooms"],
+        })
+        usernames.append(username)
+    return usernames
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path: str, port: int, timeout: float = 60.0) -> subprocess.Popen:
+    """`streamlit run main.py` on localhost, returns once the health check answers."""
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", "main.py",
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--server.address", "localhost",
+            "--server.enableXsrfProtection", "false",
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+        ],
+        env={**os.environ, "PROFILES_DB_PATH": db_path},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"Streamlit server did not start on port {port} within {timeout:.0f} s.")
+
+
+# ------------------------------------------------------------
+# Simulated browser session
+# ------------------------------------------------------------
+class SimulatedSession:
+    """One user on its own websocket: keeps widget values like the browser does and times every rerun."""
+
+    def __init__(self, url: str, username: str, password: str, seed: int):
+        self.url = url
+        self.username = username
+        self.password = password
+        self.rng = random.Random(seed)
+        self.ws = None
+        self.page = None
+        self.widgets = {}   # label -> (element type, widget id) of the last run
+        self.values = {}    # widget id -> WidgetState sent with every rerun
+        self.latencies = []  # ns per rerun
+        self.errors = 0
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def find(self, label: str):
+        if label in self.widgets:
+            return self.widgets[label]
+        for widget_label, widget in self.widgets.items():
+            if widget_label.startswith(label):
+                return widget
+        raise KeyError(f"No widget '{label}' on the current page.")
+
+    def set(self, label: str, value):
+        element_type, widget_id = self.find(label)
+        state = WidgetState(id=widget_id)
+        if element_type == "slider":
+            state.double_array_value.data.append(value)
+        else:
+            setattr(state, VALUE_FIELDS[element_type], value)
+        self.values[widget_id] = state
+
+    async def rerun(self, trigger: str = None):
+        """Send the widget state (plus an optional button click) and wait until the script finished."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(self.values.values())
+        if trigger is not None:
+            msg.rerun_script.widget_states.widgets.append(WidgetState(id=self.find(trigger)[1], trigger_value=True))
+
+        start = time.perf_counter_ns()
+        await self.ws.send(msg.SerializeToString())
+
+        widgets = {}
+        while True:
+            fm = ForwardMsg()
+            fm.ParseFromString(await self.ws.recv())
+            kind = fm.WhichOneof("type")
+            if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                element = fm.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    self.errors += 1
+                proto = getattr(element, element_type)
+                widget_id, label = getattr(proto, "id", ""), getattr(proto, "label", "")
+                if widget_id and label:
+                    widgets[label] = (element_type, widget_id)
+            elif kind == "script_finished":
+                if fm.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    widgets = {}  # st.rerun() → the server starts the next run by itself
+                    continue
+                break
+
+        latency = time.perf_counter_ns() - start
+        self.widgets = widgets
+        # like the browser: only widgets that are still on the page keep their state
+        live_ids = {widget_id for _, widget_id in widgets.values()}
+        self.values = {widget_id: state for widget_id, state in self.values.items() if widget_id in live_ids}
+        return latency
+
+    async def login(self):
+        await self.rerun()
+        await self.rerun(trigger="Login / Sign Up")
+        self.set("Username", self.username)
+        self.set("Password", self.password)
+        await self.rerun(trigger="Login")
+        await self.switch_page(self.rng.choice(PAGES))
+
+    async def switch_page(self, page: str):
+        self.set("Select a page", page)
+        self.page = page
+        return await self.rerun()
+
+    async def step(self):
+        """One user interaction followed by a timed rerun."""
+        try:
+            if self.rng.random() < PAGE_SWITCH_PROBABILITY:
+                latency = await self.switch_page(self.rng.choice([p for p in PAGES if p != self.page]))
+            else:
+                label, value = self.rng.choice(INTERACTIONS[self.page])
+                self.set(label, value(self.rng))
+                latency = await self.rerun()
+        except KeyError:  # widget missing → the page did not render as expected
+            self.errors += 1
+            latency = await self.rerun()
+        self.latencies.append(latency)
+
+    async def run_for(self, duration: float):
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            await self.step()
+
+
+# ------------------------------------------------------------
+# Load levels
+# ------------------------------------------------------------
+async def run_level(url: str, usernames: list, concurrency: int, duration: float, seed: int) -> dict:
+    """`concurrency` sessions click around in parallel for `duration` seconds."""
+    sessions = [SimulatedSession(url, usernames[i], "load", seed + i) for i in range(concurrency)]
+    try:
+        for session in sessions:  # login / first render is not part of the measurement
+            await session.connect()
+            await session.login()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(session.run_for(duration) for session in sessions))
+        elapsed = time.perf_counter() - start
+    finally:
+        for session in sessions:
+            await session.close()
+
+    latencies = np.asarray([ns for s in sessions for ns in s.latencies], dtype=float) / 1e6
+    return {
+        "concurrency": concurrency,
+        "reruns": int(len(latencies)),
+        "errors": sum(s.errors for s in sessions),
+        "reruns_per_s": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None,
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent logged-in sessions against a local app server.")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8], help="concurrent sessions per run")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=None, help="server port (default: a free one)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="loadtest_"), "profiles.db")
+    usernames = create_load_users(db_path, max(args.levels), args.seed)
+    print(f"Profiles store: {db_path} ({len(usernames)} generated users)\n")
+
+    print(f"{'sessions':>8}{'reruns':>8}{'reruns/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    results = []
+    for concurrency in args.levels:
+        # fresh server per level → every level starts with cold caches
+        port = args.port or free_port()
+        server = start_server(db_path, port)
+        try:
+            r = asyncio.run(run_level(f"ws://localhost:{port}/_stcore/stream", usernames, concurrency, args.duration, args.seed))
+        finally:
+            server.terminate()
+            server.wait()
+        results.append(r)
+        print(f"{r['concurrency']:>8}{r['reruns']:>8}{r['reruns_per_s']:>10.1f}"
+              f"{r['p50_ms'] or 0:>10.1f}{r['p95_ms'] or 0:>10.1f}{r['p99_ms'] or 0:>10.1f}{r['errors']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"duration_s": args.duration, "levels": results}, f, indent=4)
+
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,16 @@
 import streamlit as st
-import json
-import os
-from computations import label_to_amenity_col
-
-# Path for storing user profiles
-PROFILES_DATA_PATH = "data/profiles.json"
+from computations import get_label_to_amenity_col
+from profile_store import profile_store
+from timing import timed
 
 
 # -------------------------
 # Data handling utilities
 # -------------------------
-def load_data():
-    """Load all user profiles from JSON file."""
-    if os.path.exists(PROFILES_DATA_PATH):
-        try:
-            with open(PROFILES_DATA_PATH, "r") as file:
-                return json.load(file)
-        except json.JSONDecodeError:
-            return {}  # corrupt file → treat as empty
-    return {}
-
-
-def save_data(data):
-    """Save all user profiles to JSON."""
-    with open(PROFILES_DATA_PATH, "w") as file:
-        json.dump(data, file, indent=4)
-
-
+@timed("login.validate_user")
 def validate_user(username, password):
     """Check if user credentials match."""
-    data = load_data()
-    return username in data and data[username]["password"] == password
+    return profile_store.validate_user(username, password)
 
 
 # ---------------------------------------------------
@@ -104,7 +84,7 @@ def login_page():
             bathrooms = None
             bedrooms = None
 
-        amenities = st.multiselect("Select Amenities", list(label_to_amenity_col.keys()))
+        amenities = st.multiselect("Select Amenities", list(get_label_to_amenity_col().keys()))
 
         num_rooms = st.number_input("Total number of Rooms", min_value=1, step=1)
 
@@ -122,27 +102,25 @@ def login_page():
             elif new_password != confirm_password:
                 st.error("Passwords do not match.")
             else:
-                data = load_data()
-                if new_username in data:
+                new_profile = {
+                    "email": email,
+                    "password": new_password,
+
+                    "host_is_superhost": host_is_superhost,
+                    "host_listings_count": host_listings_count,
+                    "host_identity_verified": host_identity_verified,
+                    "bathrooms": bathrooms,
+                    "bedrooms": bedrooms,
+                    "arrondissement": arrondissement,
+                    "room_type": room_type,
+                    "num_rooms": num_rooms,
+                    "amenities": amenities,  # stored as list
+                }
+
+                # insert is atomic → two sessions can't create the same username
+                if not profile_store.create_profile(new_username, new_profile):
                     st.error("Username already exists!")
                 else:
-                    data[new_username] = {
-                        "email": email,
-                        "password": new_password,
-
-                        "host_is_superhost": host_is_superhost,
-                        "host_listings_count": host_listings_count,
-                        "host_identity_verified": host_identity_verified,
-                        "bathrooms": bathrooms,
-                        "bedrooms": bedrooms,
-                        "arrondissement": arrondissement,
-                        "room_type": room_type,
-                        "num_rooms": num_rooms,
-                        "amenities": amenities,  # stored as list
-                    }
-
-                    save_data(data)
-
                     st.success(f"Account created for {new_username}!")
                     st.session_state["logged_in"] = True
                     st.session_state["username"] = new_username
@@ -6,11 +6,19 @@ from pages.airbnb_page import airbnb_page
 from pages.renting_page import renting_page
 from pages.comparison import comparison_page
 from utils import import_css  
+from model_registry import model_registry
+from timing import TIMING_ENABLED, span
+from metrics import inc
+from pages.diagnostics import diagnostics_page
 
 
 
 
 def main():
+    # Start loading the ML models in the background (only once per process),
+    # so home and login render right away and the models are ready after login
+    model_registry.warm_up()
+
     # Initialize session state for 'logged_in' and 'page'
     if 'logged_in' not in st.session_state:
         st.session_state['logged_in'] = False
@@ -19,6 +27,7 @@ def main():
         st.session_state['page'] = 'home'  # Set default page to 'home', the one with our logo
 
     if not st.session_state['logged_in']:  # If the user is not logged in
+        inc("app_reruns_total", page=st.session_state['page'])
         if st.session_state['page'] == 'home':
             home_page()  # Show home page
         elif st.session_state['page'] == 'login':
@@ -35,25 +44,33 @@ def main():
             
             st.markdown("---")
 
+            # models still loading after a cold start → the first prediction waits for them
+            if not model_registry.is_ready():
+                st.caption("Loading prediction models...")
+
         # Sidebar navigation for logged-in users
         page = st.sidebar.radio("Select a page", [
             "Airbnb", 
             "Renting",
             "Comparison",
             "Profile",  # Add profile to the sidebar
-        ])
+        ] + (["Diagnostics"] if TIMING_ENABLED else []))  # hidden unless the app runs with TIMING=1
 
         # Update session state to reflect the selected page
         st.session_state['page'] = page
+        inc("app_reruns_total", page=page)
 
-        if page == "Airbnb":
-            airbnb_page()
-        elif page == "Renting":
-            renting_page()
-        elif page == "Comparison":
-            comparison_page()
-        elif page == "Profile": 
-            profile_page()
+        with span(f"page.{page.lower()}"):
+            if page == "Airbnb":
+                airbnb_page()
+            elif page == "Renting":
+                renting_page()
+            elif page == "Comparison":
+                comparison_page()
+            elif page == "Profile": 
+                profile_page()
+            elif page == "Diagnostics":
+                diagnostics_page()
 
 if __name__ == "__main__":
     main()
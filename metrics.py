@@ -0,0 +1,219 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus metrics (text exposition format 0.0.4) for scraping / capacity alerts
+# off by default, switched on by either of:
+#   METRICS_PORT=9464   → serve http://localhost:9464/metrics from a background thread
+#   METRICS_FILE=...    → rewrite the file every METRICS_FILE_SECONDS (node_exporter textfile collector)
+
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_FILE = os.environ.get("METRICS_FILE")
+METRICS_FILE_SECONDS = float(os.environ.get("METRICS_FILE_SECONDS", 15.0))
+
+# latency buckets in seconds (0.5 ms ... 10 s)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# every metric the app records: name -> (type, help, label names)
+METRICS = {
+    "app_reruns_total": ("counter", "Script reruns per page.", ("page",)),
+    "app_predictions_total": ("counter", "Feature rows scored per model.", ("model",)),
+    "app_profile_reads_total": ("counter", "Profile reads from the profile store.", ()),
+    "app_profile_writes_total": ("counter", "Profile writes (create, save, patch) to the profile store.", ()),
+    "app_span_duration_seconds": ("histogram", "Latency of the timed functions and blocks (see timing.py).", ("span",)),
+}
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in labels.items()) + "}"
+
+
+def format_value(value) -> str:
+    """Sample value at full precision (":g" would round counters above 1e6 to 6 digits)."""
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    if value.is_integer() and abs(value) < 2 ** 53:
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values = {}  # label values -> float
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(dict(zip(self.labelnames, key)))} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.values = {}  # label values -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self.values.items()):
+                labels = dict(zip(self.labelnames, key))
+                cumulative = 0
+                for le, n in zip([f"{b:g}" for b in self.buckets] + ["+Inf"], state[:-1]):
+                    cumulative += n
+                    lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': le})} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(labels)} {format_value(state[-1])}")
+                lines.append(f"{self.name}_count{format_labels(labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Counter / gauge whose samples are read at scrape time (values already counted elsewhere, e.g. cache hits)."""
+
+    def __init__(self, name: str, metric_type: str, help: str):
+        self.name = name
+        self.metric_type = metric_type
+        self.help = help
+        self.sources = []  # fn() -> list of (labels dict, value)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.metric_type}"]
+        for source in self.sources:
+            for labels, value in source():
+                lines.append(f"{self.name}{format_labels(labels)} {format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """All metrics of the process plus the HTTP listener / file writer that exposes them."""
+
+    def __init__(self, definitions: dict = METRICS):
+        self.metrics = {}
+        for name, (metric_type, help, labelnames) in definitions.items():
+            cls = Counter if metric_type == "counter" else Histogram
+            self.metrics[name] = cls(name, help, labelnames)
+        self._server = None
+        self._writer = None
+        self._stopped = threading.Event()
+
+    def register_callback(self, name: str, metric_type: str, help: str, fn):
+        """Add fn() -> [(labels, value), ...] as a source of the callback metric name."""
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = CallbackMetric(name, metric_type, help)
+        metric.sources.append(fn)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    # ------------------------------------------------------------
+    # Exposure
+    # ------------------------------------------------------------
+    def start(self, port: int = METRICS_PORT, path: str = METRICS_FILE):
+        if port and self._server is None:
+            self.start_http_server(port)
+        if path and self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, args=(path,), name="metrics-file", daemon=True)
+            self._writer.start()
+        return self
+
+    def start_http_server(self, port: int, host: str = METRICS_HOST):
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # no access log on stderr
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError:
+            return  # port taken (e.g. second app process) → no endpoint, the app keeps running
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+
+    def write_file(self, path: str):
+        """Atomic write, a scraper never sees a half-written file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def _write_loop(self, path: str):
+        while not self._stopped.wait(METRICS_FILE_SECONDS):
+            try:
+                self.write_file(path)
+            except OSError:
+                pass  # metrics are best effort, never break the app
+
+    def stop(self):
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+# process-wide registry, only created when an endpoint or file is configured
+metrics_registry = MetricsRegistry().start() if (METRICS_PORT or METRICS_FILE) else None
+
+
+def inc(name: str, amount: float = 1.0, **labels):
+    """Increment a counter from METRICS (no-op if metrics are off)."""
+    if metrics_registry is not None:
+        metrics_registry.metrics[name].inc(amount, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    """Add an observation to a histogram from METRICS (no-op if metrics are off)."""
+    if metrics_registry is not None:
+        metrics_registry.metrics[name].observe(value, **labels)
@@ -0,0 +1,116 @@
+import pickle
+import hashlib
+import threading
+from feature_schema import expected_model_hash
+
+# lazy registry for the ML models - nothing is unpickled at import time,
+# so pages that don't predict (home, login) render right away after a cold start
+
+MODEL_PATHS = {
+    "airbnb": "ml_models/predict_airbnb_price.sav",
+    "cleaning": "ml_models/predict_cost_of_cleaning.sav",
+    "renting": "ml_models/predict_renting_price.sav",
+}
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, used to tie cached predictions to the exact model file."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Loads each model on first use (or from a background warm-up thread) and keeps it
+    for the lifetime of the process. Loading is guarded per model, so a page that needs
+    a model while the warm-up thread is loading it simply waits instead of loading it twice.
+    """
+
+    def __init__(self, paths: dict):
+        self.paths = dict(paths)
+        self._models = {}
+        self._hashes = {}
+        self._errors = {}
+        self._loading = set()
+        self._locks = {name: threading.Lock() for name in self.paths}
+        self._warm_up_thread = None
+        self._warm_up_lock = threading.Lock()
+
+    def get(self, name: str):
+        """Return the model, loading it now if it is not loaded yet."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._locks[name]:
+            if name not in self._models:
+                self._loading.add(name)
+                try:
+                    self.check_hash(name)
+                    with open(self.paths[name], "rb") as f:
+                        self._models[name] = pickle.load(f)
+                    self._errors.pop(name, None)
+                except Exception as e:
+                    self._errors[name] = e
+                    raise
+                finally:
+                    self._loading.discard(name)
+        return self._models[name]
+
+    def file_hash(self, name: str) -> str:
+        """SHA-256 of the model file (computed once, does not unpickle the model)."""
+        if name not in self._hashes:
+            self._hashes[name] = file_sha256(self.paths[name])
+        return self._hashes[name]
+
+    def check_hash(self, name: str):
+        """Refuse a model file that differs from the one the feature schema was generated from."""
+        expected = expected_model_hash(name)
+        actual = self.file_hash(name)
+        if actual != expected:
+            raise ValueError(
+                f"Model file '{self.paths[name]}' (sha256 {actual[:12]}...) does not match the feature schema "
+                f"(sha256 {expected[:12]}...). Run `python feature_schema.py` to regenerate the schema."
+            )
+
+    def is_ready(self, name: str = None) -> bool:
+        """True if the given model (or every model when name is None) is loaded."""
+        names = [name] if name else self.paths
+        return all(n in self._models for n in names)
+
+    def status(self) -> dict:
+        """Readiness per model: "ready", "loading", "failed" or "not loaded"."""
+        result = {}
+        for name in self.paths:
+            if name in self._models:
+                result[name] = "ready"
+            elif name in self._loading:
+                result[name] = "loading"
+            elif name in self._errors:
+                result[name] = "failed"
+            else:
+                result[name] = "not loaded"
+        return result
+
+    def warm_up(self, names: list = None) -> threading.Thread:
+        """Start loading the models in a background thread (only once per process)."""
+        with self._warm_up_lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(
+                    target=self._load_all, args=(list(names or self.paths),), name="model-warm-up", daemon=True
+                )
+                self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def _load_all(self, names):
+        for name in names:
+            try:
+                self.get(name)
+            except Exception:
+                pass  # error is kept in self._errors, the page will raise it on first real use
+
+
+model_registry = ModelRegistry(MODEL_PATHS)
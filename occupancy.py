@@ -0,0 +1,63 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+# occupancy per arrondissement, loaded once into a 21-slot array (index = arrondissement, slot 0 unused)
+# the csv is only parsed again when the file changes
+
+OCCUPANCY_PATH = "data/occupancy_arrondissement.csv"
+
+
+class OccupancyTable:
+    """Occupancy in percent per arrondissement plus the precomputed city median."""
+
+    def __init__(self, path: str = OCCUPANCY_PATH):
+        self.path = path
+        self.values = np.full(21, np.nan)
+        self.city_median = np.nan
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            occ_df = pd.read_csv(self.path)
+            values = np.full(21, np.nan)
+            arr = occ_df["Arrondissement"].to_numpy(dtype=int)
+            valid = (arr >= 1) & (arr <= 20)
+            values[arr[valid]] = occ_df["Occupancy in percent"].to_numpy(dtype=float)[valid]
+
+            self.values = values
+            self.city_median = float(occ_df["Occupancy in percent"].median())
+            self._mtime = mtime
+
+    def get(self, arrondissement: int):
+        """Occupancy in percent (1-100) for one arrondissement, None if unknown."""
+        self._refresh()
+        arr = int(arrondissement)
+        if not 1 <= arr <= 20 or np.isnan(self.values[arr]):
+            return None
+        return float(self.values[arr])
+
+    def get_many(self, arrondissements) -> np.ndarray:
+        """Vectorized lookup, NaN for unknown arrondissements."""
+        self._refresh()
+        arr = np.asarray(arrondissements, dtype=int)
+        result = np.full(arr.shape, np.nan)
+        valid = (arr >= 1) & (arr <= 20)
+        result[valid] = self.values[arr[valid]]
+        return result
+
+    def median(self) -> float:
+        """City median occupancy in percent."""
+        self._refresh()
+        return self.city_median
+
+
+# process-wide table used by the Airbnb and Comparison pages
+occupancy_table = OccupancyTable()
@@ -2,10 +2,13 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import json
-from login import load_data
+import threading
+from geometry import arrondissement_geometry
+from timing import span
+from profile_store import profile_store
+from occupancy import occupancy_table
 from computations import (
-    label_to_amenity_col,
+    get_label_to_amenity_col,
     run_computations_airbnb,
     predict_all_arrondissement_prices,
     calculate_price_impact_kpis,
@@ -18,6 +21,51 @@ def fmt(num):
     return f"{num:,.0f}".replace(",", "'")
 
 
+# ------------------------------------------------------------
+# Map figure template — built once per process (and city),
+# reruns only patch the 20 price values and the highlighted arrondissement
+# ------------------------------------------------------------
+MAP_LOCATIONS = [str(75100 + n) for n in range(1, 21)]
+
+price_map_templates = {}
+price_map_lock = threading.Lock()  # figure is shared by all sessions: patch + send under the lock
+
+
+def get_price_map_template(city, geojson_data, featureidkey, coords):
+    if city not in price_map_templates:
+        base_df = pd.DataFrame({"Arrondissement_Code": MAP_LOCATIONS, "Avg_Price_Apt": [0] * len(MAP_LOCATIONS)})
+
+        fig_map = px.choropleth_mapbox(
+            base_df,
+            geojson=geojson_data,
+            locations="Arrondissement_Code",
+            featureidkey=featureidkey,
+            color="Avg_Price_Apt",
+            color_continuous_scale="Reds",
+            mapbox_style="carto-positron",
+            zoom=10.5,
+            center={"lat": coords[0], "lon": coords[1]},
+            opacity=0.8,
+        )
+
+        # highlight trace for the selected arrondissement (location is set per rerun)
+        h = px.choropleth_mapbox(
+            base_df.iloc[:1],
+            geojson=geojson_data,
+            locations="Arrondissement_Code",
+            featureidkey=featureidkey,
+            color_discrete_sequence=["#E57370"],
+            opacity=0.01,
+        )
+        fig_map.add_trace(h.data[0])
+        fig_map.data[-1].marker.line.width = 3
+        fig_map.data[-1].marker.line.color = "white"
+
+        with price_map_lock:
+            price_map_templates.setdefault(city, fig_map)
+    return price_map_templates[city]
+
+
 def airbnb_page():
 
     # ------------------------------------------------------------
@@ -27,8 +75,9 @@ def airbnb_page():
     GEOJSON_FEATURE_ID_KEY = "properties.c_arinsee"
 
     try:
-        with open("data/paris.geojson", "r", encoding="utf-8") as f:
-            geojson_data = json.load(f)
+        # parsed once per process, simplified polygons → smaller payload for the browser
+        with span("geojson.load"):
+            geojson_data = arrondissement_geometry.simplified()
     except:
         st.error("GeoJSON file missing or invalid. Map cannot be displayed.")
 
@@ -36,8 +85,8 @@ def airbnb_page():
     # Load current user profile
     # ------------------------------------------------------------
     username = st.session_state.get("username")
-    all_users = load_data()
-    user_profile = all_users.get(username, {}) if username else {}
+    with span("profile.load"):
+        user_profile = profile_store.get_profile_cached(username) or {}
 
     # ------------------------------------------------------------
     # Extract user defaults
@@ -60,7 +109,7 @@ def airbnb_page():
     # ------------------------------------------------------------
     # Amenity Handling — critical for preventing Streamlit errors
     # ------------------------------------------------------------
-    amenities_options = list(label_to_amenity_col.keys())
+    amenities_options = list(get_label_to_amenity_col().keys())
 
     user_amenities = user_profile.get("amenities", [])
 
@@ -171,29 +220,17 @@ def airbnb_page():
             "amenities": amenities,
         }
 
-        # Run prediction models
+        # Run the base prediction (price + cleaning cost) - every tab needs it, cached across sessions
         run_computations_airbnb(user_sidebar_data)
 
-        try:
-            st.session_state["df_map_prices"] = predict_all_arrondissement_prices(user_sidebar_data)
-        except:
-            st.session_state["df_map_prices"] = None
-
         pred_price = st.session_state.get("user_price_prediction", 0)
         pred_cleaning = st.session_state.get("user_cleaning_cost_prediction", 0)
 
-        try:
-            st.session_state["impact_kpis"] = calculate_price_impact_kpis(user_sidebar_data, pred_price)
-        except:
-            st.session_state["impact_kpis"] = None
-
         # Revenue calc
         try:
-            occ_df = pd.read_csv("data/occupancy_arrondissement.csv")
-            city_median = occ_df["Occupancy in percent"].median()
-            st.session_state["city_median_occupancy"] = city_median
-            occ = occ_df.loc[occ_df["Arrondissement"] == int(arrondissement), "Occupancy in percent"]
-            occupation = occ.iloc[0] / 100 if not occ.empty else 0.5
+            st.session_state["city_median_occupancy"] = occupancy_table.median()
+            occ = occupancy_table.get(arrondissement)
+            occupation = occ / 100 if occ is not None else 0.5
         except:
             occupation = 0.5
 
@@ -208,32 +245,59 @@ def airbnb_page():
 
     # ------------------------------------------------------------
     # TABS: Summary / Map / Price Breakdown
+    # only the open tab runs (tab switches rerun the page); each tab function gets its inputs explicitly
     # ------------------------------------------------------------
-    tab_summary, tab_map, tab_contrib = st.tabs([
+    tab_summary, tab_map, tab_contrib = lazy_tabs([
         "Prediction Summary",
         "Location & Map",
         "Price Contribution Breakdown",
-    ])
+    ], key="airbnb_tabs")
 
-    # ------------------------------------------------------------
-    # TAB 1 — SUMMARY
-    # ------------------------------------------------------------
     with tab_summary:
+        if tab_is_open(tab_summary):
+            summary_tab(pred_price, pred_cleaning)
 
-        pred_revenue = st.session_state["prediction_monthly_revenue_user"]
-        pred_clean_month = st.session_state["prediction_cleaning_costs_per_month_user"]
-        pred_net = st.session_state["prediction_net_income_user"]
+    with tab_map:
+        if tab_is_open(tab_map):
+            map_tab(user_sidebar_data, city, geojson_data, GEOJSON_FEATURE_ID_KEY)
 
-        st.markdown('<div class="card" style="background:#333; color:white;">', unsafe_allow_html=True)
-        st.subheader("📈 Price per Night")
+    with tab_contrib:
+        if tab_is_open(tab_contrib):
+            contrib_tab(user_sidebar_data, pred_price)
 
-        low, high = int(pred_price * 0.85), int(pred_price * 1.15)
 
-        colA, colB = st.columns(2)
-        colA.metric("Suggested nightly rate", f"€{fmt(pred_price)}")
-        colB.metric("Competitive range", f"€{fmt(low)} - €{fmt(high)}")
+def lazy_tabs(labels, key):
+    """st.tabs that reruns on tab switch so only the open tab executes (older Streamlit: every tab runs)."""
+    try:
+        return st.tabs(labels, key=key, on_change="rerun")
+    except TypeError:
+        return st.tabs(labels)
+
+
+def tab_is_open(tab):
+    return getattr(tab, "open", None) is not False
+
+
+# ------------------------------------------------------------
+# TAB 1 — SUMMARY
+# ------------------------------------------------------------
+def summary_tab(pred_price, pred_cleaning):
+
+    pred_revenue = st.session_state["prediction_monthly_revenue_user"]
+    pred_clean_month = st.session_state["prediction_cleaning_costs_per_month_user"]
+    pred_net = st.session_state["prediction_net_income_user"]
 
-        # Bullet Chart
+    st.markdown('<div class="card" style="background:#333; color:white;">', unsafe_allow_html=True)
+    st.subheader("📈 Price per Night")
+
+    low, high = int(pred_price * 0.85), int(pred_price * 1.15)
+
+    colA, colB = st.columns(2)
+    colA.metric("Suggested nightly rate", f"€{fmt(pred_price)}")
+    colB.metric("Competitive range", f"€{fmt(low)} - €{fmt(high)}")
+
+    # Bullet Chart
+    with span("figure.bullet"):
         fig = go.Figure()
         fig.add_trace(go.Bar(y=["Price"], x=[high], orientation="h",
                              marker=dict(color="rgba(107,114,128,0.2)")))
@@ -249,93 +313,92 @@ def airbnb_page():
         )
         st.plotly_chart(fig, use_container_width=True)
 
-        # Net Income Block
-        st.subheader("💰 Net Monthly Income")
-        low_net, high_net = int(pred_net * 0.85), int(pred_net * 1.15)
+    # Net Income Block
+    st.subheader("💰 Net Monthly Income")
+    low_net, high_net = int(pred_net * 0.85), int(pred_net * 1.15)
 
-        col1, col2 = st.columns([1.5, 2])
-        col1.markdown(f"## €{fmt(pred_net)}")
-        col2.metric("Potential range", f"€{fmt(low_net)} – €{fmt(high_net)}")
+    col1, col2 = st.columns([1.5, 2])
+    col1.markdown(f"## €{fmt(pred_net)}")
+    col2.metric("Potential range", f"€{fmt(low_net)} – €{fmt(high_net)}")
 
-        st.table(pd.DataFrame({
-            "Metric": ["Gross Revenue", "Cleaning Costs", "Net Income"],
-            "Value (€)": [fmt(pred_revenue), f"-{fmt(pred_clean_month)}", fmt(pred_net)]
-        }))
+    st.table(pd.DataFrame({
+        "Metric": ["Gross Revenue", "Cleaning Costs", "Net Income"],
+        "Value (€)": [fmt(pred_revenue), f"-{fmt(pred_clean_month)}", fmt(pred_net)]
+    }))
 
-        st.caption(f"*Estimated cleaning cost per cleaning: €{pred_cleaning}")
+    st.caption(f"*Estimated cleaning cost per cleaning: €{pred_cleaning}")
 
-    # ------------------------------------------------------------
-    # TAB 2 — MAP
-    # ------------------------------------------------------------
-    with tab_map:
 
-        map_price_df = st.session_state.get("df_map_prices")
-        occupation = st.session_state["occupation_rate"]
-
-        st.markdown('<div class="card" style="background:#242424; color:white;">', unsafe_allow_html=True)
-        st.subheader("Map & Price Analysis")
-
-        if geojson_data and map_price_df is not None:
-
-            city = st.session_state["sb_city"]
-            coords = {
-                "Paris": (48.8566, 2.3522),
-                "Vienna": (48.2082, 16.3738),
-                "Berlin": (52.5200, 13.4050),
-                "Zurich": (47.3769, 8.5417),
-            }[city]
-
-            insee_map = {
-                n: 75100 + n for n in range(1, 21)
-            }
-            arr_code = str(insee_map.get(int(arrondissement), 75101))
-
-            fig_map = px.choropleth_mapbox(
-                map_price_df,
-                geojson=geojson_data,
-                locations="Arrondissement_Code",
-                featureidkey=GEOJSON_FEATURE_ID_KEY,
-                color="Avg_Price_Apt",
-                color_continuous_scale="Reds",
-                mapbox_style="carto-positron",
-                zoom=10.5,
-                center={"lat": coords[0], "lon": coords[1]},
-                opacity=0.8,
-            )
+# ------------------------------------------------------------
+# TAB 2 — MAP
+# ------------------------------------------------------------
+def map_tab(user_sidebar_data, city, geojson_data, GEOJSON_FEATURE_ID_KEY):
 
-            # highlight selected arrondissement
-            highlight_df = map_price_df[map_price_df["Arrondissement_Code"] == arr_code]
-            if not highlight_df.empty:
-                h = px.choropleth_mapbox(
-                    highlight_df,
-                    geojson=geojson_data,
-                    locations="Arrondissement_Code",
-                    featureidkey=GEOJSON_FEATURE_ID_KEY,
-                    color_discrete_sequence=["#E57370"],
-                    opacity=0.01,
-                )
-                fig_map.add_trace(h.data[0])
-                fig_map.data[-1].marker.line.width = 3
-                fig_map.data[-1].marker.line.color = "white"
-
-            st.plotly_chart(fig_map, use_container_width=True)
-
-        st.markdown("</div>", unsafe_allow_html=True)
+    # heatmap over all 20 arrondissements - only computed when this tab is shown
+    try:
+        st.session_state["df_map_prices"] = predict_all_arrondissement_prices(user_sidebar_data)
+    except:
+        st.session_state["df_map_prices"] = None
 
-    # ------------------------------------------------------------
-    # TAB 3 — CONTRIBUTION BREAKDOWN
-    # ------------------------------------------------------------
-    with tab_contrib:
-        st.markdown('<div class="card" style="background:#242424; color:white;">', unsafe_allow_html=True)
-        st.subheader("Key Price Drivers")
+    map_price_df = st.session_state.get("df_map_prices")
+    arrondissement = user_sidebar_data["arrondissement"]
+
+    st.markdown('<div class="card" style="background:#242424; color:white;">', unsafe_allow_html=True)
+    st.subheader("Map & Price Analysis")
+
+    if geojson_data and map_price_df is not None:
+
+        coords = {
+            "Paris": (48.8566, 2.3522),
+            "Vienna": (48.2082, 16.3738),
+            "Berlin": (52.5200, 13.4050),
+            "Zurich": (47.3769, 8.5417),
+        }[city]
+
+        insee_map = {
+            n: 75100 + n for n in range(1, 21)
+        }
+        arr_code = str(insee_map.get(int(arrondissement), 75101))
+
+        # prices in the fixed location order of the figure template
+        prices = map_price_df.set_index("Arrondissement_Code")["Avg_Price_Apt"]
+        z_values = [int(prices.get(code, 0)) for code in MAP_LOCATIONS]
+
+        # only z values + highlight location change per rerun → patch the shared template
+        with span("figure.map"):
+            fig_map = get_price_map_template(city, geojson_data, GEOJSON_FEATURE_ID_KEY, coords)
+            with price_map_lock:
+                fig_map.data[0].z = z_values
+                fig_map.data[1].locations = [arr_code]
+                fig_map.data[1].visible = arr_code in prices.index
+                st.plotly_chart(fig_map, use_container_width=True)
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+# ------------------------------------------------------------
+# TAB 3 — CONTRIBUTION BREAKDOWN
+# ------------------------------------------------------------
+def contrib_tab(user_sidebar_data, pred_price):
+    st.markdown('<div class="card" style="background:#242424; color:white;">', unsafe_allow_html=True)
+    st.subheader("Key Price Drivers")
+
+    # benchmark scenarios - only computed when this tab is shown
+    try:
+        st.session_state["impact_kpis"] = calculate_price_impact_kpis(
+            user_sidebar_data, pred_price, base_df=st.session_state.get("user_airbnb_feature_df")
+        )
+    except:
+        st.session_state["impact_kpis"] = None
 
-        impact = st.session_state.get("impact_kpis")
+    impact = st.session_state.get("impact_kpis")
 
-        if impact:
-            baseline = impact["baseline_price"]
-            qual = impact["quality_impact"]
-            loc = impact["location_impact"]
+    if impact:
+        baseline = impact["baseline_price"]
+        qual = impact["quality_impact"]
+        loc = impact["location_impact"]
 
+        with span("figure.waterfall"):
             fig_w = go.Figure(go.Waterfall(
                 x=["Baseline", "Quality", "Location", "Final"],
                 y=[baseline, qual, loc, pred_price],
@@ -357,4 +420,4 @@ def airbnb_page():
 
             st.plotly_chart(fig_w, use_container_width=True)
 
-        st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
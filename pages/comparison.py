@@ -1,8 +1,11 @@
 # comparison_page.py
 import streamlit as st
 import pandas as pd
-from login import load_data
+from profile_store import profile_store
+from occupancy import occupancy_table
 from computations import run_computations_airbnb, run_computations_renting
+from compute_graph import ComputeGraph
+from timing import span
 import plotly.express as px
 
 
@@ -10,6 +13,41 @@ def fmt(num):
     return f"{num:,.0f}".replace(",", "'")
 
 
+# ------------------------------------------------------------
+# Computation graph: predictions depend on the property inputs only,
+# occupancy enters after prediction (revenue / cleaning arithmetic)
+# ------------------------------------------------------------
+def airbnb_prediction(airbnb_data):
+    run_computations_airbnb(airbnb_data)
+    return st.session_state.get("user_price_prediction"), st.session_state.get("user_cleaning_cost_prediction")
+
+
+def renting_prediction(renting_data):
+    run_computations_renting(renting_data)
+    return st.session_state.get("user_renting_price_prediction")
+
+
+def build_comparison_graph():
+    graph = ComputeGraph()
+    graph.node("airbnb_prediction", ["airbnb_data"], airbnb_prediction)
+    graph.node("nightly_price", ["airbnb_prediction"], lambda prediction: prediction[0])
+    graph.node("cleaning_cost", ["airbnb_prediction"], lambda prediction: prediction[1])
+    graph.node("monthly_rent_price", ["renting_data"], renting_prediction)
+
+    # Airbnb monthly net income
+    graph.node("monthly_revenue_airbnb", ["nightly_price", "occupancy"],
+               lambda price, occupancy: price * 30 * occupancy)
+    graph.node("monthly_cleaning_costs", ["cleaning_cost", "occupancy"],
+               lambda cleaning, occupancy: (30 * occupancy) / 4.8 * cleaning)  # avg stay length
+    graph.node("net_income_airbnb", ["monthly_revenue_airbnb", "monthly_cleaning_costs"],
+               lambda revenue, cleaning: revenue - cleaning)
+
+    # Renting monthly net income
+    graph.node("net_income_rent", ["monthly_rent_price"], lambda rent: rent)
+    graph.node("diff", ["net_income_airbnb", "net_income_rent"], lambda airbnb, rent: airbnb - rent)
+    return graph
+
+
 def comparison_page():
     
     username = st.session_state.get("username")
@@ -17,8 +55,8 @@ def comparison_page():
         st.error("Please log in to see the comparison.")
         return
 
-    all_users = load_data()
-    user_profile = all_users.get(username, {})
+    with span("profile.load"):
+        user_profile = profile_store.get_profile_cached(username) or {}
     if not user_profile:
         st.error("No profile data found. Please complete your profile first.")
         return
@@ -84,8 +122,7 @@ def comparison_page():
         st.subheader("Occupancy assumption for Airbnb")
         
         # Load default occupancy based on arrondissement
-        data_occ = pd.read_csv("data/occupancy_arrondissement.csv")
-        occ_default = data_occ.loc[data_occ["Arrondissement"] == int(arrondissement),"Occupancy in percent"].iloc[0] # rememeber it's in percent!!! number from 1 - 100
+        occ_default = occupancy_table.get(arrondissement) # rememeber it's in percent!!! number from 1 - 100
 
         # create slider - allow for change in assumptions of occupancy
         occupancy_user = st.slider(f"Expected occupancy for arrondissement {arrondissement} (%)", min_value=10.0, max_value=100.0,value=float(occ_default),step=1.0)
@@ -114,23 +151,22 @@ def comparison_page():
         #"rent": user_profile.get("rent", True),
     }
 
-    # Run models on inputs of sidebar 
-    run_computations_airbnb(airbnb_data)
-    nightly_price = st.session_state.get("user_price_prediction")
-    cleaning_cost = st.session_state.get("user_cleaning_cost_prediction")
-
-    run_computations_renting(renting_data)
-    monthly_rent_price = st.session_state.get("user_renting_price_prediction")
+    # Run models on inputs of sidebar - only the nodes whose inputs changed are recomputed,
+    # so moving the occupancy slider is pure arithmetic (no model calls)
+    if "comparison_graph" not in st.session_state:
+        st.session_state["comparison_graph"] = build_comparison_graph()
 
-    # Airbnb monthly net income  
-    occupancy = occupancy_user / 100.0 # diveded 100 because it was in percentage!
-    monthly_revenue_airbnb = nightly_price * 30 * occupancy
-    number_of_monthly_cleaning = (30 * occupancy) / 4.8  # avg stay length
-    monthly_cleaning_costs = number_of_monthly_cleaning * cleaning_cost
-    net_income_airbnb = monthly_revenue_airbnb - monthly_cleaning_costs
+    results = st.session_state["comparison_graph"].evaluate({
+        "airbnb_data": airbnb_data,
+        "renting_data": renting_data,
+        "occupancy": occupancy_user / 100.0,  # diveded 100 because it was in percentage!
+    })
 
-    # Renting monthly net income
-    net_income_rent = monthly_rent_price
+    occupancy = results["occupancy"]
+    monthly_revenue_airbnb = results["monthly_revenue_airbnb"]
+    monthly_cleaning_costs = results["monthly_cleaning_costs"]
+    net_income_airbnb = results["net_income_airbnb"]
+    net_income_rent = results["net_income_rent"]
 
     # Comparison layout 
     col_left, col_right = st.columns(2)
@@ -153,7 +189,7 @@ def comparison_page():
 
 
     # Comparison / difference
-    diff = net_income_airbnb - net_income_rent
+    diff = results["diff"]
     if diff > 0:
         better = "Airbnb"
     elif diff < 0:
@@ -179,33 +215,34 @@ def comparison_page():
     })
     
     # Bar Chart mit Plotly Express (für Farb- und Hintergrundkontrolle)
-    fig_comp = px.bar(
-        comp_df,
-        x="Strategy",
-        y="Net monthly income (€)",
-        color="Color",
-        color_discrete_map={
-            "Airbnb": "#E57370",    # Rot/Koralle für die Hervorhebung
-            "Renting": "#808080"    # Grau für den Vergleich
-        },
-        text="Net monthly income (€)",
-        title="Net Monthly Income Comparison"
-    )
-
-    # Layout Anpassungen für Dunkles/Graues Thema
-    fig_comp.update_traces(texttemplate='€%{text:,.0f}', textposition='outside')
-    fig_comp.update_layout(
-        showlegend=False,
-        plot_bgcolor='rgba(0, 0, 0, 0)',        # Transparent
-        paper_bgcolor='rgba(0, 0, 0, 0)',       # Transparent
-        font=dict(color='white'),       # Weiße Schrift
-        xaxis_title="",
-        yaxis_title="Net monthly income (€)",
-        height=550
-    )
+    with span("figure.comparison"):
+        fig_comp = px.bar(
+            comp_df,
+            x="Strategy",
+            y="Net monthly income (€)",
+            color="Color",
+            color_discrete_map={
+                "Airbnb": "#E57370",    # Rot/Koralle für die Hervorhebung
+                "Renting": "#808080"    # Grau für den Vergleich
+            },
+            text="Net monthly income (€)",
+            title="Net Monthly Income Comparison"
+        )
+
+        # Layout Anpassungen für Dunkles/Graues Thema
+        fig_comp.update_traces(texttemplate='€%{text:,.0f}', textposition='outside')
+        fig_comp.update_layout(
+            showlegend=False,
+            plot_bgcolor='rgba(0, 0, 0, 0)',        # Transparent
+            paper_bgcolor='rgba(0, 0, 0, 0)',       # Transparent
+            font=dict(color='white'),       # Weiße Schrift
+            xaxis_title="",
+            yaxis_title="Net monthly income (€)",
+            height=550
+        )
     
-    # Ersetzen Sie den alten st.bar_chart Aufruf
-    st.plotly_chart(fig_comp, use_container_width=True)
+        # Ersetzen Sie den alten st.bar_chart Aufruf
+        st.plotly_chart(fig_comp, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Footer
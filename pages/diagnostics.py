@@ -0,0 +1,54 @@
+import streamlit as st
+import pandas as pd
+from timing import span_registry
+from computations import prediction_cache
+from profile_store import profile_store
+from model_registry import model_registry
+
+
+# ------------------------------------------------------------
+# DIAGNOSTICS PAGE (only in the sidebar when TIMING=1)
+# process-wide numbers since start / last reset, all sessions together
+# ------------------------------------------------------------
+def diagnostics_page():
+    st.title("Diagnostics")
+
+    if span_registry is None:
+        st.info("Timing is off. Start the app with TIMING=1 to record spans.")
+        return
+
+    st.caption("Numbers cover every session of this process since it started (or since the last reset).")
+
+    spans = pd.DataFrame(span_registry.snapshot())
+
+    # Slowest spans
+    st.subheader("Slowest spans (p95)")
+    if spans.empty:
+        st.write("No spans recorded yet - use the other pages first.")
+    else:
+        slowest = spans.sort_values("p95_ms", ascending=False).head(10)
+        st.dataframe(slowest.round(3), hide_index=True, use_container_width=True)
+
+        # All spans, by total time spent
+        st.subheader("All spans (by total time)")
+        st.dataframe(spans.round(3), hide_index=True, use_container_width=True)
+
+    # Cache hit rates
+    st.subheader("Caches")
+    caches = pd.DataFrame([
+        {"cache": "predictions", **prediction_cache.stats()},
+        {"cache": "profiles", **profile_store.cache_stats()},
+    ])
+    caches["hit_rate"] = (caches["hit_rate"] * 100).round(1).astype(str) + " %"
+    st.dataframe(caches, hide_index=True, use_container_width=True)
+
+    # Models
+    st.subheader("Models")
+    st.dataframe(
+        pd.DataFrame([{"model": name, "status": status} for name, status in model_registry.status().items()]),
+        hide_index=True, use_container_width=True,
+    )
+
+    if st.button("Reset span statistics"):
+        span_registry.reset()
+        st.rerun()
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 from datetime import date
-from login import load_data
+from profile_store import profile_store
+from timing import span
 import plotly.express as px 
 import plotly.graph_objects as go 
 
@@ -25,8 +26,8 @@ def renting_page():
 
     # Load user profile if logged in
     username = st.session_state.get("username")
-    all_users = load_data()
-    user_profile = all_users.get(username, {}) if username else {}
+    with span("profile.load"):
+        user_profile = profile_store.get_profile_cached(username) or {}
 
 
     # Minimal Styling 
@@ -94,30 +95,31 @@ def renting_page():
         'Category': ['Low End', 'Suggested Rate', 'High End']
     })
 
-    fig_rent = px.bar(
-        rent_data, 
-        x='Price (€)', 
-        y='Category', 
-        orientation='h', 
-        color='Category',
-        color_discrete_map={
-            'Low End': 'rgba(107, 114, 128, 0.4)', 
-            'Suggested Rate': '#E57370', # App-Akzentfarbe
-            'High End': 'rgba(107, 114, 128, 0.6)' 
-        },
-        title=f"Your Predicted Rent ({arrondissement_names.get(arrondissement, 'Paris')}) vs. Market Range"
-    )
-
-    fig_rent.update_layout(
-        showlegend=False,
-        plot_bgcolor='rgba(0, 0, 0, 0)',
-        paper_bgcolor='rgba(0, 0, 0, 0)',
-        font=dict(color='white'),
-        title_font_color='white',
-        height=300
-    )
-
-    st.plotly_chart(fig_rent, use_container_width=True)
+    with span("figure.renting"):
+        fig_rent = px.bar(
+            rent_data, 
+            x='Price (€)', 
+            y='Category', 
+            orientation='h', 
+            color='Category',
+            color_discrete_map={
+                'Low End': 'rgba(107, 114, 128, 0.4)', 
+                'Suggested Rate': '#E57370', # App-Akzentfarbe
+                'High End': 'rgba(107, 114, 128, 0.6)' 
+            },
+            title=f"Your Predicted Rent ({arrondissement_names.get(arrondissement, 'Paris')}) vs. Market Range"
+        )
+
+        fig_rent.update_layout(
+            showlegend=False,
+            plot_bgcolor='rgba(0, 0, 0, 0)',
+            paper_bgcolor='rgba(0, 0, 0, 0)',
+            font=dict(color='white'),
+            title_font_color='white',
+            height=300
+        )
+
+        st.plotly_chart(fig_rent, use_container_width=True)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -0,0 +1,268 @@
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from metrics import metrics_registry, inc
+
+# SQLite storage for user profiles - one row per user instead of rewriting all of profiles.json
+# WAL mode: readers never block the writer, concurrent sessions can't overwrite each other's profiles
+
+PROFILES_DB_PATH = os.environ.get("PROFILES_DB_PATH", "data/profiles.db")
+
+# old storage, imported once into the database if the database is empty
+PROFILES_JSON_PATH = "data/profiles.json"
+
+# connections kept open for reuse (Streamlit runs every rerun on a new thread, so per-thread
+# connections would reopen the database and redo the PRAGMAs on each rerun)
+PROFILES_DB_POOL_SIZE = int(os.environ.get("PROFILES_DB_POOL_SIZE", 8))
+
+
+class ProfileStore:
+    """
+    Profile storage backed by SQLite. Connections come from a small process-wide pool:
+    each call borrows one for its statement / transaction and hands it back afterwards.
+    """
+
+    def __init__(self, db_path: str = PROFILES_DB_PATH, seed_json_path: str = PROFILES_JSON_PATH,
+                 pool_size: int = PROFILES_DB_POOL_SIZE):
+        self.db_path = db_path
+        self.seed_json_path = seed_json_path
+        self.pool_size = pool_size
+        self._pool = []  # idle connections
+        self._pool_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._cache = {}  # username -> (version, parsed profile)
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # ------------------------------------------------------------
+    # Connection / schema
+    # ------------------------------------------------------------
+    def _open(self) -> sqlite3.Connection:
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        # autocommit with explicit BEGIN; a pooled connection moves between threads, but only one uses it at a time
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection (opened only if none is idle) for the duration of the block."""
+        with self._pool_lock:
+            conn = self._pool.pop() if self._pool else None
+        if conn is None:
+            conn = self._open()
+        try:
+            if not self._initialized:
+                self._init_schema(conn)
+            yield conn
+        finally:
+            if conn.in_transaction:  # never hand out a connection with a transaction left open
+                conn.rollback()
+            with self._pool_lock:
+                if len(self._pool) < self.pool_size:
+                    self._pool.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def _init_schema(self, conn: sqlite3.Connection):
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS profiles (
+                    username TEXT PRIMARY KEY,
+                    data     TEXT NOT NULL,
+                    version  INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            # databases created before profile versions existed
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(profiles)")]
+            if "version" not in columns:
+                conn.execute("ALTER TABLE profiles ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            self._import_json_seed(conn)
+            self._initialized = True
+
+    def _import_json_seed(self, conn: sqlite3.Connection):
+        """Copy the old profiles.json into an empty database (runs once)."""
+        if conn.execute("SELECT 1 FROM profiles LIMIT 1").fetchone() is not None:
+            return
+        if not os.path.exists(self.seed_json_path):
+            return
+        try:
+            with open(self.seed_json_path, "r") as f:
+                profiles = json.load(f)
+        except json.JSONDecodeError:
+            return  # corrupt file → start empty
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO profiles (username, data) VALUES (?, ?)",
+                [(username, json.dumps(profile)) for username, profile in profiles.items()],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------
+    def get_profile(self, username: str):
+        """Profile dict of one user, or None if the user does not exist."""
+        if not username:
+            return None
+        inc("app_profile_reads_total")
+        with self._connection() as conn:
+            row = conn.execute("SELECT data FROM profiles WHERE username = ?", (username,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_profile_cached(self, username: str):
+        """
+        Like get_profile, but memoized across reruns and sessions: the stored version is
+        checked (one indexed lookup) and the JSON is only parsed again if it changed.
+        The returned dict is shared - treat it as read-only.
+        """
+        version = self.get_version(username) if username else None
+        if version is None:
+            return None
+        inc("app_profile_reads_total")
+
+        with self._cache_lock:
+            cached = self._cache.get(username)
+            if cached is not None and cached[0] == version:
+                self.cache_hits += 1
+                return cached[1]
+            self.cache_misses += 1
+
+        with self._connection() as conn:
+            row = conn.execute("SELECT data, version FROM profiles WHERE username = ?", (username,)).fetchone()
+        if row is None:
+            return None
+        profile = json.loads(row[0])
+        with self._cache_lock:
+            self._cache[username] = (row[1], profile)
+        return profile
+
+    def cache_stats(self) -> dict:
+        """Hit rate of get_profile_cached (same keys as PredictionCache.stats)."""
+        with self._cache_lock:
+            total = self.cache_hits + self.cache_misses
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "size": len(self._cache),
+                "max_entries": None,
+                "hit_rate": self.cache_hits / total if total else 0.0,
+            }
+
+    def user_exists(self, username: str) -> bool:
+        with self._connection() as conn:
+            row = conn.execute("SELECT 1 FROM profiles WHERE username = ?", (username,)).fetchone()
+        return row is not None
+
+    def get_version(self, username: str):
+        """Profile version (bumped on every change), or None if the user does not exist."""
+        with self._connection() as conn:
+            row = conn.execute("SELECT version FROM profiles WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def validate_user(self, username: str, password: str) -> bool:
+        """Check if user credentials match (reads only this user's row)."""
+        profile = self.get_profile(username)
+        return profile is not None and profile.get("password") == password
+
+    def load_all(self) -> dict:
+        """All profiles as {username: profile} (admin/export use, not for page renders)."""
+        with self._connection() as conn:
+            rows = conn.execute("SELECT username, data FROM profiles").fetchall()
+        inc("app_profile_reads_total", len(rows))
+        return {username: json.loads(data) for username, data in rows}
+
+    # ------------------------------------------------------------
+    # Writes (each one is a single transaction)
+    # ------------------------------------------------------------
+    def create_profile(self, username: str, profile: dict) -> bool:
+        """Insert a new user. Returns False if the username is already taken."""
+        with self._connection() as conn:
+            try:
+                conn.execute("INSERT INTO profiles (username, data) VALUES (?, ?)", (username, json.dumps(profile)))
+            except sqlite3.IntegrityError:
+                return False
+        inc("app_profile_writes_total")
+        return True
+
+    def save_profile(self, username: str, profile: dict):
+        """Insert or replace the whole profile of one user."""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO profiles (username, data) VALUES (?, ?) "
+                "ON CONFLICT(username) DO UPDATE SET data = excluded.data, version = version + 1",
+                (username, json.dumps(profile)),
+            )
+        inc("app_profile_writes_total")
+
+    def patch_profile(self, username: str, changes: dict):
+        """
+        Apply a partial update to one user's profile in a single transaction.
+
+        The changes are diffed against the stored profile and only the fields that really
+        changed are written (json_set on those keys). The version is bumped only if something
+        changed. Returns (list of changed fields, new version).
+        """
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT data, version FROM profiles WHERE username = ?", (username,)).fetchone()
+                if row is None:
+                    raise KeyError(f"No profile for user '{username}'.")
+                stored, version = json.loads(row[0]), row[1]
+
+                changed = {k: v for k, v in changes.items() if k not in stored or stored[k] != v}
+                if changed:
+                    paths = ", ".join("?, json(?)" for _ in changed)
+                    params = []
+                    for key, value in changed.items():
+                        params += [json_path(key), json.dumps(value)]
+                    conn.execute(
+                        f"UPDATE profiles SET data = json_set(data, {paths}), version = version + 1 WHERE username = ?",
+                        (*params, username),
+                    )
+                    version += 1
+
+                conn.execute("COMMIT")
+                if changed:
+                    inc("app_profile_writes_total")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return list(changed), version
+
+
+def json_path(key: str) -> str:
+    """SQLite JSON path for a top-level key (keys can contain spaces, e.g. "Number of rooms renting")."""
+    return '$."' + key.replace('"', '\\"') + '"'
+
+
+# process-wide store used by login and the pages
+profile_store = ProfileStore()
+
+if metrics_registry is not None:
+    metrics_registry.register_callback(
+        "app_cache_hits_total", "counter", "Cache hits per cache.",
+        lambda: [({"cache": "profiles"}, profile_store.cache_hits)],
+    )
+    metrics_registry.register_callback(
+        "app_cache_misses_total", "counter", "Cache misses per cache.",
+        lambda: [({"cache": "profiles"}, profile_store.cache_misses)],
+    )
@@ -0,0 +1,73 @@
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from feature_schema import expected_model_hash
+
+# precomputed renting prices for the full input grid of the renting model
+# 20 arrondissements x 1-10 rooms x unfurnished/furnished = 400 cells
+# regenerate after retraining the renting model with:  python renting_table.py
+
+TABLE_PATH = "ml_models/renting_price_table.npz"
+
+ARRONDISSEMENTS = range(1, 21)
+ROOMS = range(1, 11)
+FURNISHED = (False, True)
+
+
+def build_renting_table(path: str = TABLE_PATH) -> np.ndarray:
+    """Evaluate the renting model once over the whole grid and save it with the model hash."""
+    from computations import encode_renting_features, model_renting_price, rent_features
+    from model_registry import model_registry
+
+    profiles = [
+        {"arrondissement": arr, "Number of rooms renting": rooms, "furnished": furnished}
+        for arr in ARRONDISSEMENTS
+        for rooms in ROOMS
+        for furnished in FURNISHED
+    ]
+    X = encode_renting_features(profiles)
+    prices = model_renting_price().predict(pd.DataFrame(X, columns=rent_features))
+    prices = prices.reshape(len(ARRONDISSEMENTS), len(ROOMS), len(FURNISHED))
+
+    np.savez(path, prices=prices, sha256=np.array(model_registry.file_hash("renting")))
+    load_renting_table.cache_clear()
+    return prices
+
+
+@lru_cache(maxsize=None)
+def load_renting_table(path: str = TABLE_PATH):
+    """
+    Returns the (20, 10, 2) price table, or None if it is missing or was built
+    from a different renting model than the one in the feature schema.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if str(data["sha256"]) != expected_model_hash("renting"):
+            return None
+        return data["prices"]
+
+
+def lookup_renting_price(user_profile: dict):
+    """O(1) renting price for inputs on the grid, None for anything else (→ use the model)."""
+    table = load_renting_table()
+    if table is None:
+        return None
+
+    try:
+        arr = int(user_profile.get("arrondissement", 1))
+        rooms = float(user_profile.get("Number of rooms renting"))
+    except (TypeError, ValueError):
+        return None
+
+    if arr not in ARRONDISSEMENTS or not rooms.is_integer() or int(rooms) not in ROOMS:
+        return None
+
+    furnished = int(bool(user_profile.get("furnished", False)))
+    return float(table[arr - ARRONDISSEMENTS.start, int(rooms) - ROOMS.start, furnished])
+
+
+if __name__ == "__main__":
+    prices = build_renting_table()
+    print(f"Renting table {prices.shape} written to {TABLE_PATH} (min €{prices.min():.0f}, max €{prices.max():.0f})")
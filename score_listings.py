@@ -0,0 +1,222 @@
+import os
+import sys
+import csv
+import math
+import time
+import argparse
+from itertools import islice
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from computations import room_categories, score_profiles, get_airbnb_booster, get_cleaning_cost_coefficients
+
+# bulk scoring of listing portfolios from a CSV
+#
+#   python score_listings.py listings.csv scored.csv
+#   python score_listings.py listings.csv scored.csv --workers 8 --chunk-size 10000
+#
+# the input is read in chunks, every chunk is parsed and scored in a worker process with one
+# batched predict per model (computations.score_profiles) and the results are appended to the
+# output in input order. at most --workers * 2 chunks are in flight, so memory stays bounded
+# no matter how large the file is.
+#
+# input columns (header names, only arrondissement is required, the rest falls back to the app defaults):
+#   host_is_superhost, host_listings_count, host_identity_verified, bathrooms, bedrooms,
+#   arrondissement, room_type, amenities (labels separated by "|"), rooms_renting, furnished
+# output: the input columns plus nightly_price, cleaning_cost, monthly_rent and error
+
+RESULT_COLUMNS = ["nightly_price", "cleaning_cost", "monthly_rent", "error"]
+
+AMENITY_SEPARATOR = "|"
+
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+FALSE_VALUES = {"0", "false", "no", "n", "f"}
+
+# the feature matrices are float32 - larger values would become inf in the models
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+# ------------------------------------------------------------
+# Parsing (CSV strings → profile dicts)
+# ------------------------------------------------------------
+def parse_bool(value: str) -> bool:
+    value = value.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"not a boolean: '{value}'")
+
+
+def parse_amenities(value: str) -> list:
+    return [label for label in map(str.strip, value.split(AMENITY_SEPARATOR)) if label]
+
+
+def parse_number(value: str) -> float:
+    number = float(value)
+    if not math.isfinite(number) or abs(number) > FLOAT32_MAX:
+        raise ValueError(f"not a finite number: '{value}'")
+    return number
+
+
+def parse_int(value: str) -> int:
+    number = parse_number(value)
+    if not number.is_integer():
+        raise ValueError(f"not a whole number: '{value}'")
+    return int(number)
+
+
+# CSV column → (profile key, parser)
+CSV_FIELDS = {
+    "host_is_superhost": ("host_is_superhost", parse_bool),
+    "host_listings_count": ("host_listings_count", parse_int),
+    "host_identity_verified": ("host_identity_verified", parse_bool),
+    "bathrooms": ("bathrooms", parse_int),
+    "bedrooms": ("bedrooms", parse_int),
+    "arrondissement": ("arrondissement", parse_int),
+    "room_type": ("room_type", str.strip),
+    "amenities": ("amenities", parse_amenities),
+    "rooms_renting": ("Number of rooms renting", parse_number),
+    "furnished": ("furnished", parse_bool),
+}
+
+
+def parse_row(header: list, row: list) -> dict:
+    """One CSV row → profile dict; empty cells keep the app defaults. Raises ValueError on bad values."""
+    profile = {}
+    for column, value in zip(header, row):
+        field = CSV_FIELDS.get(column)
+        if field is None or not value.strip():
+            continue
+        key, parse = field
+        try:
+            profile[key] = parse(value)
+        except ValueError as e:
+            raise ValueError(f"{column}: {e}") from None
+
+    if not 1 <= profile.get("arrondissement", 0) <= 20:
+        raise ValueError("arrondissement must be between 1 and 20")
+    if profile.get("room_type", room_categories[0]) not in room_categories:
+        raise ValueError(f"unknown room_type '{profile['room_type']}'")
+    return profile
+
+
+# ------------------------------------------------------------
+# Workers
+# ------------------------------------------------------------
+def warm_up_worker():
+    """
+    Load the models once per worker process instead of on its first chunk. Not the renting
+    forest: rents come from the precomputed table, predict_renting_prices only loads the
+    model if a chunk has inputs off the grid.
+    """
+    get_airbnb_booster(1)
+    get_cleaning_cost_coefficients()
+
+
+def score_chunk(header: list, rows: list, nthread: int = 1) -> list:
+    """Parses and scores one chunk; returns the output rows (input cells + results) in input order."""
+    profiles, valid, errors = [], [], {}
+    for i, row in enumerate(rows):
+        try:
+            profiles.append(parse_row(header, row))
+            valid.append(i)
+        except ValueError as e:
+            errors[i] = str(e)
+
+    try:
+        results = score_valid_rows(profiles, valid, nthread)
+    except (ValueError, OverflowError):
+        # a value the parsers let through broke the batch → score row by row, only that row fails
+        results = {}
+        for profile, i in zip(profiles, valid):
+            try:
+                results.update(score_valid_rows([profile], [i], nthread))
+            except (ValueError, OverflowError) as e:
+                errors[i] = str(e)
+    # short / long rows are padded / cut to the header, so the results stay under their columns
+    width = len(header)
+    return [
+        (row + [""] * (width - len(row)))[:width] + results.get(i, ["", "", "", errors.get(i)])
+        for i, row in enumerate(rows)
+    ]
+
+
+def score_valid_rows(profiles: list, indices: list, nthread: int) -> dict:
+    """Row index → result cells for the parsed profiles of a chunk (one batched predict per model)."""
+    scores = score_profiles(profiles, nthread=nthread)
+    columns = zip(scores["nightly_price"].tolist(), scores["cleaning_cost"].tolist(), scores["monthly_rent"].tolist())
+    return {i: [price, cleaning, rent, ""] for i, (price, cleaning, rent) in zip(indices, columns)}
+
+
+def read_chunks(reader, chunk_size: int):
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            return
+        yield rows
+
+
+# ------------------------------------------------------------
+# Pipeline
+# ------------------------------------------------------------
+def score_file(input_path: str, output_path: str, workers: int = None, chunk_size: int = 5000) -> dict:
+    """Streams input_path → output_path. workers=1 scores in this process (no pool)."""
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    n_rows = n_errors = 0
+
+    with open(input_path, newline="", encoding="utf-8") as f_in, open(output_path, "w", newline="", encoding="utf-8") as f_out:
+        reader = csv.reader(f_in)
+        writer = csv.writer(f_out)
+        header = [column.strip() for column in next(reader)]
+        if "arrondissement" not in header:
+            raise ValueError(f"{input_path}: the 'arrondissement' column is required.")
+        writer.writerow(header + RESULT_COLUMNS)
+
+        def write(rows):
+            nonlocal n_rows, n_errors
+            writer.writerows(rows)
+            n_rows += len(rows)
+            n_errors += sum(1 for row in rows if row[-1])
+
+        if workers == 1:
+            warm_up_worker()
+            for rows in read_chunks(reader, chunk_size):
+                write(score_chunk(header, rows, nthread=None))
+        else:
+            # bounded window of chunks in flight, written in submission order
+            with ProcessPoolExecutor(max_workers=workers, initializer=warm_up_worker) as pool:
+                pending = deque()
+                for rows in read_chunks(reader, chunk_size):
+                    pending.append(pool.submit(score_chunk, header, rows))
+                    if len(pending) >= workers * 2:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": n_rows,
+        "errors": n_errors,
+        "seconds": round(elapsed, 2),
+        "rows_per_s": round(n_rows / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Score a CSV of listings (nightly price, cleaning cost, monthly rent).")
+    parser.add_argument("input", help="CSV with one listing per row")
+    parser.add_argument("output", help="CSV to write (input columns + predictions)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count, 1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="rows per batched predict")
+    args = parser.parse_args(argv)
+
+    summary = score_file(args.input, args.output, args.workers, args.chunk_size)
+    print(f"Scored {summary['rows']} rows in {summary['seconds']} s ({summary['rows_per_s']} rows/s), "
+          f"{summary['errors']} rows with errors → {args.output}")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import os
+import time
+import threading
+from functools import wraps
+from metrics import metrics_registry, observe
+
+# lightweight span timers for the hot paths (profile load, GeoJSON, encoding, each predict, figures)
+# switched on with the environment variable TIMING=1 (in-app Diagnostics page) and/or by enabling the
+# Prometheus export (metrics.py, histogram app_span_duration_seconds). with both off span() returns a
+# shared no-op context and @timed returns the function unchanged, so disabled spans cost almost nothing
+#
+#   with span("figure.map"):
+#       ...
+#
+#   @timed("predict.airbnb")
+#   def predict_airbnb_log_prices(...):
+
+TIMING_ENABLED = os.environ.get("TIMING") == "1"
+
+# histogram bucket upper bounds in µs: 1, 2, 4, ... ~67 s (last bucket takes everything above)
+BUCKET_BOUNDS_US = [2 ** i for i in range(27)]
+
+
+class SpanStats:
+    """Call count, total / max time and a log2 histogram of one span name."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * len(BUCKET_BOUNDS_US)
+
+    def add(self, ns: int):
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        bucket = (ns // 1000).bit_length()  # µs → index of the next power of two
+        self.buckets[min(bucket, len(self.buckets) - 1)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound (ms) of the histogram bucket that holds the q-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bound_us, n in zip(BUCKET_BOUNDS_US, self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound_us / 1000, self.max_ns / 1e6)
+        return self.max_ns / 1e6
+
+
+class SpanRegistry:
+    """Per-span statistics for the whole process (all sessions)."""
+
+    def __init__(self):
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, ns: int):
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = SpanStats()
+            stats.add(ns)
+
+    def snapshot(self) -> list:
+        """One dict per span, slowest (by total time) first."""
+        with self._lock:
+            rows = [
+                {
+                    "span": name,
+                    "calls": s.count,
+                    "total_ms": s.total_ns / 1e6,
+                    "mean_ms": s.total_ns / s.count / 1e6,
+                    "p50_ms": s.percentile(50),
+                    "p95_ms": s.percentile(95),
+                    "p99_ms": s.percentile(99),
+                    "max_ms": s.max_ns / 1e6,
+                }
+                for name, s in self._spans.items() if s.count
+            ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+# process-wide registry, only created when timing is switched on
+span_registry = SpanRegistry() if TIMING_ENABLED else None
+
+# spans are measured if anything consumes them
+SPANS_ENABLED = span_registry is not None or metrics_registry is not None
+
+
+def record(name: str, ns: int):
+    if span_registry is not None:
+        span_registry.record(name, ns)
+    observe("app_span_duration_seconds", ns / 1e9, span=name)
+
+
+def span(name: str):
+    """Context manager that times its block under name (no-op if timing and metrics are off)."""
+    if not SPANS_ENABLED:
+        return _NO_SPAN
+    return _Span(name)
+
+
+def timed(name: str):
+    """Decorator version of span(); leaves the function untouched if timing and metrics are off."""
+    def decorator(fn):
+        if not SPANS_ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter_ns() - start)
+        return wrapper
+    return decorator